@@ -0,0 +1,302 @@
+"""
+Result caching for Neo4j Context Provider.
+
+Provides a similarity-aware LRU cache so repeated or near-duplicate
+queries can be answered without another round-trip to Neo4j, and an
+exact-match embedding cache so repeated texts skip the embedding service.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Hashable, Sequence
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+import numpy as np
+import numpy.typing as npt
+from neo4j_graphrag.embeddings import Embedder
+
+T = TypeVar("T")
+
+# Default number of texts kept by CachedEmbedder
+DEFAULT_EMBEDDING_CACHE_SIZE = 4096
+
+# CachedEmbedder key personalization for embed_query / embed_documents
+_QUERY = b"query"
+_DOCUMENT = b"document"
+
+
+@dataclass(slots=True)
+class _CacheEntry(Generic[T]):
+    """A single cached value with its (unit-normalized) query embedding."""
+
+    embedding: npt.NDArray[np.float32] | None
+    value: T
+    expires_at: float
+
+
+@dataclass(slots=True)
+class QueryCache(Generic[T]):
+    """LRU cache with TTL expiry and cosine-similarity lookup.
+
+    Entries are grouped by a hashable key (e.g. index name and top_k).
+    Within a key, a lookup returns the entry whose embedding is most
+    similar to the query embedding, provided its cosine similarity is at
+    least ``similarity_threshold``. Entries stored without an embedding only match by key,
+    so callers should include the query text in the key for exact-match
+    caching; similarity lookups skip them.
+
+    Embeddings for a key are stacked lazily into one contiguous float32
+    matrix so a lookup is a single matrix-vector product. The matrix is
+    rebuilt only after the key's entries change.
+
+    Args:
+        max_size: Maximum number of entries across all keys.
+        ttl_seconds: Time-to-live for each entry.
+        similarity_threshold: Minimum cosine similarity for a cache hit.
+    """
+
+    max_size: int = 128
+    ttl_seconds: float = 300.0
+    similarity_threshold: float = 0.97
+    _entries: OrderedDict[Hashable, list[_CacheEntry[T]]] = field(default_factory=OrderedDict, init=False, repr=False)
+    # Per key: stacked embeddings and the entry index of each matrix row
+    _matrices: dict[Hashable, tuple[npt.NDArray[np.float32], list[int]]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _size: int = field(default=0, init=False, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, key: Hashable, embedding: Sequence[float] | None = None) -> T | None:
+        """Look up a cached value.
+
+        Args:
+            key: Cache key the value was stored under.
+            embedding: Query embedding for similarity matching, or None
+                for exact key matching.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            self._purge_expired(key, entries)
+            if not entries:
+                return None
+
+            if embedding is None:
+                index = len(entries) - 1
+            else:
+                stacked = self._matrices.get(key)
+                if stacked is None:
+                    # Entries stored without an embedding get no row
+                    rows = [i for i, e in enumerate(entries) if e.embedding is not None]
+                    vectors = [e.embedding for e in entries if e.embedding is not None]
+                    matrix = np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+                    stacked = self._matrices[key] = (matrix, rows)
+                matrix, rows = stacked
+                if not rows:
+                    return None
+                # Rows are unit-normalized at insert, so one matrix-vector
+                # product gives every cosine; take the closest entry
+                scores = matrix @ _normalize(embedding)
+                row = int(np.argmax(scores))
+                if scores[row] < self.similarity_threshold:
+                    return None
+                index = rows[row]
+
+            self._entries.move_to_end(key)
+            return entries[index].value
+
+    def put(self, key: Hashable, value: T, embedding: Sequence[float] | None = None) -> None:
+        """Store a value, evicting least-recently-used entries when full.
+
+        Args:
+            key: Cache key to store the value under.
+            value: Value to cache.
+            embedding: Query embedding for similarity matching, or None
+                to replace any value stored under the key.
+        """
+        if self.max_size < 1:
+            return
+        with self._lock:
+            entries = self._entries.setdefault(key, [])
+            self._entries.move_to_end(key)
+            if embedding is None:
+                self._size -= len(entries)
+                entries.clear()
+            entries.append(
+                _CacheEntry(
+                    embedding=None if embedding is None else _normalize(embedding),
+                    value=value,
+                    expires_at=time.monotonic() + self.ttl_seconds,
+                )
+            )
+            self._size += 1
+            self._matrices.pop(key, None)
+
+            while self._size > self.max_size:
+                oldest_key, oldest = next(iter(self._entries.items()))
+                oldest.pop(0)
+                self._size -= 1
+                self._matrices.pop(oldest_key, None)
+                if not oldest:
+                    del self._entries[oldest_key]
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+            self._size = 0
+
+    def _purge_expired(self, key: Hashable, entries: list[_CacheEntry[T]]) -> None:
+        """Drop expired entries for a key (caller holds the lock)."""
+        now = time.monotonic()
+        live = [e for e in entries if e.expires_at > now]
+        if len(live) == len(entries):
+            return
+        self._size -= len(entries) - len(live)
+        self._matrices.pop(key, None)
+        if live:
+            entries[:] = live
+        else:
+            del self._entries[key]
+            entries.clear()
+
+
+class CachedEmbedder(Embedder):
+    """Embedder wrapper that caches embeddings by exact text.
+
+    Keys are 16-byte BLAKE2b digests of the UTF-8 text, so memory use
+    doesn't grow with text length, and embeddings are kept as float32
+    arrays (about 6 KB for 1536 dimensions, a quarter of a list of Python
+    floats). Query and document embeddings are keyed separately, since
+    embedders may embed the two differently (e.g. the Azure AI embedder's
+    QUERY and DOCUMENT input types). Least-recently-used entries are evicted once ``max_size``
+    texts are cached.
+
+    Args:
+        embedder: The embedder to delegate cache misses to.
+        max_size: Maximum number of cached embeddings.
+    """
+
+    def __init__(self, embedder: Embedder, max_size: int = DEFAULT_EMBEDDING_CACHE_SIZE) -> None:
+        super().__init__()
+        self.embedder = embedder
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, npt.NDArray[np.float32]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed text, reusing a cached embedding for previously seen text."""
+        key = _text_key(text, _QUERY)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+        embedding = self.embedder.embed_query(text)
+        self._put(key, embedding)
+        return embedding
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a batch of texts, sending only cache misses to the embedder.
+
+        Misses are embedded with the wrapped embedder's ``embed_documents``
+        when it has one, otherwise one ``embed_query`` call per text.
+        """
+        keys = [_text_key(text, _DOCUMENT) for text in texts]
+        results = [self._get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            embed_documents = getattr(self.embedder, "embed_documents", None)
+            if embed_documents is not None:
+                embeddings = list(embed_documents(missing_texts))
+            else:
+                embeddings = [self.embedder.embed_query(text) for text in missing_texts]
+            for i, embedding in zip(missing, embeddings, strict=True):
+                results[i] = embedding
+                self._put(keys[i], embedding)
+        return results  # type: ignore[return-value]
+
+    def clear(self) -> None:
+        """Remove all cached embeddings."""
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key: bytes) -> list[float] | None:
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                return None
+            self._entries.move_to_end(key)
+        result: list[float] = embedding.tolist()
+        return result
+
+    def _put(self, key: bytes, embedding: list[float]) -> None:
+        if self.max_size < 1:
+            return
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+# Cached wrappers shared by every provider using the same embedder, so
+# separate sessions reuse each other's embeddings. Entries disappear once
+# no provider holds the wrapper.
+_shared_embedders: weakref.WeakValueDictionary[tuple[int, int], CachedEmbedder] = weakref.WeakValueDictionary()
+_shared_embedders_lock = threading.Lock()
+
+
+def get_cached_embedder(embedder: Embedder, max_size: int = DEFAULT_EMBEDDING_CACHE_SIZE) -> CachedEmbedder:
+    """Return the shared CachedEmbedder for an embedder, creating it if needed.
+
+    Args:
+        embedder: The embedder to wrap. Already-wrapped embedders are
+            returned unchanged.
+        max_size: Maximum number of cached embeddings.
+
+    Returns:
+        A CachedEmbedder delegating to ``embedder``.
+    """
+    if isinstance(embedder, CachedEmbedder):
+        return embedder
+    # The wrapper holds a strong reference to the embedder, so its id
+    # can't be reused while the entry is alive
+    key = (id(embedder), max_size)
+    with _shared_embedders_lock:
+        cached = _shared_embedders.get(key)
+        if cached is None:
+            cached = CachedEmbedder(embedder, max_size=max_size)
+            _shared_embedders[key] = cached
+        return cached
+
+
+def _text_key(text: str, kind: bytes) -> bytes:
+    """Hash text to a compact cache key, personalized by embedding kind."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16, person=kind).digest()
+
+
+def _normalize(embedding: Sequence[float]) -> npt.NDArray[np.float32]:
+    """Convert an embedding to a unit-length float32 vector."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    if norm > 0.0:
+        vector = vector / norm
+    return vector
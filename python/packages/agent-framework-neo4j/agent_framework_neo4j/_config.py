@@ -1,23 +1,18 @@
 """
 Configuration models for Neo4j Context Provider.
 
-Provides Pydantic-based configuration validation for the Neo4jContextProvider,
+Provides configuration validation for the Neo4jContextProvider,
 including type aliases and default values.
 """
 
 from __future__ import annotations
 
-import sys
-from typing import Literal
+from dataclasses import dataclass, fields
+from typing import Literal, TypedDict
 
 from neo4j_graphrag.embeddings import Embedder
-from pydantic import BaseModel, ConfigDict, field_validator, model_validator
-
-if sys.version_info >= (3, 12):
-    from typing import Self
-else:
-    from typing_extensions import Self
 
+from ._cache import DEFAULT_EMBEDDING_CACHE_SIZE
 
 # Roles that can be stored as memories
 MemoryRole = Literal["user", "assistant", "system"]
@@ -25,6 +20,21 @@ MemoryRole = Literal["user", "assistant", "system"]
 # Type alias for index types
 IndexType = Literal["vector", "fulltext", "hybrid"]
 
+
+class DriverOptions(TypedDict):
+    """Keyword arguments for neo4j driver construction (pool tuning)."""
+
+    max_connection_pool_size: int
+    connection_acquisition_timeout: float
+    connection_timeout: float
+    max_transaction_retry_time: float
+    max_connection_lifetime: float
+    keep_alive: bool
+
+
+# Default size of the provider's retriever search thread pool
+DEFAULT_MAX_CONCURRENT_SEARCHES = 32
+
 # Default context prompt for Neo4j knowledge graph context
 DEFAULT_CONTEXT_PROMPT = (
     "## Knowledge Graph Context\n"
@@ -32,21 +42,36 @@ DEFAULT_CONTEXT_PROMPT = (
 )
 
 
-class ProviderConfig(BaseModel):
-    """
-    Pydantic model for Neo4jContextProvider configuration validation.
+# Valid values for Literal-typed options, checked in ProviderConfig.__post_init__
+VALID_INDEX_TYPES: frozenset[str] = frozenset({"vector", "fulltext", "hybrid"})
+VALID_MEMORY_ROLES: frozenset[str] = frozenset({"user", "assistant", "system"})
+
 
-    Validates all configuration parameters and their interdependencies.
-    After validation, values are extracted to instance attributes.
+@dataclass(frozen=True, slots=True, kw_only=True)
+class ProviderConfig:
     """
+    Configuration for Neo4jContextProvider.
 
-    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+    Validates all configuration parameters and their interdependencies in
+    ``__post_init__``. The checks are simple range, membership and
+    dependency tests, so a plain frozen dataclass is used rather than a
+    Pydantic model to keep provider construction cheap. After validation,
+    values are extracted to instance attributes.
+    """
 
     # Connection settings
     uri: str | None = None
     username: str | None = None
     password: str | None = None
 
+    # Driver connection-pool tuning
+    max_connection_pool_size: int = 100
+    connection_acquisition_timeout: float = 60.0
+    connection_timeout: float = 30.0
+    max_transaction_retry_time: float = 30.0
+    max_connection_lifetime: float = 3600.0
+    keep_alive: bool = True
+
     # Index configuration
     index_name: str
     index_type: IndexType = "vector"
@@ -59,15 +84,30 @@ class ProviderConfig(BaseModel):
     top_k: int = 5
     context_prompt: str = DEFAULT_CONTEXT_PROMPT
     message_history_count: int = 10
+    min_query_words: int = 0
     filter_stop_words: bool | None = None
 
-    # Embedder (validated separately due to complex type)
+    # Retriever result cache (disabled when cache_max_size is 0)
+    cache_max_size: int = 0
+    cache_ttl_seconds: float = 300.0
+    cache_similarity_threshold: float = 0.97
+
+    # Embedder
     embedder: Embedder | None = None
+    max_concurrent_embeddings: int = 4
+    max_concurrent_searches: int = DEFAULT_MAX_CONCURRENT_SEARCHES
+    embedding_cache_size: int = DEFAULT_EMBEDDING_CACHE_SIZE
 
     # Memory configuration (Phase 1)
     memory_enabled: bool = False
     memory_label: str = "Memory"
     memory_roles: tuple[MemoryRole, ...] = ("user", "assistant")
+    background_memory_writes: bool = False
+    memory_embed_min_length: int = 0
+    quantize_memory_embeddings: bool = False
+    memory_flush_interval: float = 0.0
+    memory_exact_search: bool = False
+    memory_embedding_dimensions: int | None = None
 
     # Memory index configuration (Phase 1B - lazy initialization)
     overwrite_memory_index: bool = False
@@ -81,31 +121,60 @@ class ProviderConfig(BaseModel):
     thread_id: str | None = None
     scope_to_per_operation_thread_id: bool = False
 
-    @field_validator("top_k")
-    @classmethod
-    def top_k_must_be_positive(cls, v: int) -> int:
-        if v < 1:
+    def __post_init__(self) -> None:
+        """Validate field types and values, then interdependent options."""
+        # A dataclass doesn't enforce its annotations, so check the numeric
+        # options before comparing them (bool is an int subclass, reject it)
+        for name in _INT_FIELDS:
+            value = getattr(self, name)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+                raise ValueError(f"{name} must be an integer, got {type(value).__name__}")
+        for name in _FLOAT_FIELDS:
+            value = getattr(self, name)
+            if isinstance(value, bool) or not isinstance(value, int | float):
+                raise ValueError(f"{name} must be a number, got {type(value).__name__}")
+        if self.max_connection_pool_size < 1:
+            raise ValueError("max_connection_pool_size must be at least 1")
+        if (
+            self.connection_acquisition_timeout <= 0
+            or self.connection_timeout <= 0
+            or self.max_transaction_retry_time <= 0
+        ):
+            raise ValueError("connection timeouts must be greater than 0")
+        if self.max_connection_lifetime <= 0:
+            raise ValueError("max_connection_lifetime must be greater than 0")
+        if self.index_type not in VALID_INDEX_TYPES:
+            raise ValueError(f"Invalid index_type: {self.index_type}. Must be one of {sorted(VALID_INDEX_TYPES)}")
+        if self.top_k < 1:
             raise ValueError("top_k must be at least 1")
-        return v
-
-    @field_validator("message_history_count")
-    @classmethod
-    def message_history_must_be_positive(cls, v: int) -> int:
-        if v < 1:
+        if self.message_history_count < 1:
             raise ValueError("message_history_count must be at least 1")
-        return v
-
-    @field_validator("memory_roles")
-    @classmethod
-    def memory_roles_must_be_valid(cls, v: tuple[MemoryRole, ...]) -> tuple[MemoryRole, ...]:
-        valid_roles = {"user", "assistant", "system"}
-        for role in v:
-            if role not in valid_roles:
-                raise ValueError(f"Invalid memory role: {role}. Must be one of {valid_roles}")
-        return v
-
-    @model_validator(mode="after")
-    def validate_config(self) -> Self:
+        if self.min_query_words < 0:
+            raise ValueError("min_query_words must be at least 0")
+        if self.max_concurrent_embeddings < 1:
+            raise ValueError("max_concurrent_embeddings must be at least 1")
+        if self.max_concurrent_searches < 1:
+            raise ValueError("max_concurrent_searches must be at least 1")
+        if self.embedding_cache_size < 0:
+            raise ValueError("embedding_cache_size must be at least 0")
+        if self.cache_max_size < 0:
+            raise ValueError("cache_max_size must be at least 0")
+        if self.cache_ttl_seconds <= 0:
+            raise ValueError("cache_ttl_seconds must be greater than 0")
+        if not 0.0 < self.cache_similarity_threshold <= 1.0:
+            raise ValueError("cache_similarity_threshold must be in (0, 1]")
+        if self.memory_flush_interval < 0:
+            raise ValueError("memory_flush_interval must be at least 0")
+        if self.memory_embed_min_length < 0:
+            raise ValueError("memory_embed_min_length must be at least 0")
+        if self.memory_embedding_dimensions is not None and self.memory_embedding_dimensions < 1:
+            raise ValueError("memory_embedding_dimensions must be at least 1")
+        for role in self.memory_roles:
+            if role not in VALID_MEMORY_ROLES:
+                raise ValueError(f"Invalid memory role: {role}. Must be one of {sorted(VALID_MEMORY_ROLES)}")
+        self.validate_config()
+
+    def validate_config(self) -> None:
         """Validate interdependent configuration options."""
         # Hybrid search requires fulltext index
         if self.index_type == "hybrid" and not self.fulltext_index_name:
@@ -121,20 +190,13 @@ class ProviderConfig(BaseModel):
 
         # Memory requires at least one scope filter (following Mem0/Redis pattern)
         if self.memory_enabled:
-            has_scope = any([
-                self.application_id,
-                self.agent_id,
-                self.user_id,
-                self.thread_id,
-            ])
+            has_scope = self.application_id or self.agent_id or self.user_id or self.thread_id
             if not has_scope:
                 raise ValueError(
                     "Memory requires at least one scope filter: "
                     "application_id, agent_id, user_id, or thread_id"
                 )
 
-        return self
-
     # Type-safe accessors for conditionally required fields
     # These return non-optional types after validation guarantees
 
@@ -156,9 +218,35 @@ class ProviderConfig(BaseModel):
             raise ValueError("embedder not set")
         return self.embedder
 
+    def get_driver_options(self) -> DriverOptions:
+        """Get keyword arguments for neo4j driver construction (pool tuning)."""
+        return {
+            "max_connection_pool_size": self.max_connection_pool_size,
+            "connection_acquisition_timeout": self.connection_acquisition_timeout,
+            "connection_timeout": self.connection_timeout,
+            "max_transaction_retry_time": self.max_transaction_retry_time,
+            "max_connection_lifetime": self.max_connection_lifetime,
+            "keep_alive": self.keep_alive,
+        }
+
+    def get_split_driver_options(self) -> tuple[DriverOptions, DriverOptions]:
+        """Get driver options for the retrieval and memory drivers.
+
+        neo4j-graphrag retrievers need a sync driver while memory runs on an
+        async one, so the two share max_connection_pool_size: memory gets a
+        quarter of it and retrieval the rest (at least one connection each).
+        """
+        pool_size = self.max_connection_pool_size
+        memory_pool_size = max(1, pool_size // 4)
+        retrieval_options = self.get_driver_options()
+        memory_options = self.get_driver_options()
+        retrieval_options["max_connection_pool_size"] = max(1, pool_size - memory_pool_size)
+        memory_options["max_connection_pool_size"] = memory_pool_size
+        return retrieval_options, memory_options
+
     def get_connection(self) -> tuple[str, str, str]:
         """Get validated connection config - raises if not all fields set."""
-        if not all([self.uri, self.username, self.password]):
+        if not (self.uri and self.username and self.password):
             raise ValueError(
                 "Neo4j connection requires uri, username, and password. "
                 "Set via constructor or NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD env vars."
@@ -168,3 +256,9 @@ class ProviderConfig(BaseModel):
         assert self.username is not None
         assert self.password is not None
         return self.uri, self.username, self.password
+
+
+# Numeric options by annotation (strings under postponed evaluation),
+# type-checked in ProviderConfig.__post_init__
+_INT_FIELDS = tuple(f.name for f in fields(ProviderConfig) if f.type in ("int", "int | None"))
+_FLOAT_FIELDS = tuple(f.name for f in fields(ProviderConfig) if f.type == "float")
@@ -16,6 +16,9 @@ if TYPE_CHECKING:
     from azure.ai.inference import EmbeddingsClient  # type: ignore[import-untyped]
     from azure.core.credentials import TokenCredential
 
+# Maximum number of inputs sent in a single embeddings request
+MAX_EMBED_BATCH_SIZE = 2048
+
 
 class AzureAIEmbedder(Embedder):
     """
@@ -97,6 +100,34 @@ class AzureAIEmbedder(Embedder):
             raise ValueError(f"Unexpected embedding type: {type(embedding)}")
         return embedding
 
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed multiple texts with as few requests as possible.
+
+        Sends up to MAX_EMBED_BATCH_SIZE texts per embeddings request instead
+        of one request per text.
+
+        Args:
+            texts: Texts to convert to vector embeddings.
+
+        Returns:
+            One vector embedding per input text, in input order.
+        """
+        from azure.ai.inference.models import EmbeddingInputType
+
+        embeddings: list[list[float]] = []
+        for start in range(0, len(texts), MAX_EMBED_BATCH_SIZE):
+            response = self._client.embed(
+                input=texts[start : start + MAX_EMBED_BATCH_SIZE],
+                model=self._model,
+                input_type=EmbeddingInputType.DOCUMENT,
+            )
+            for item in sorted(response.data, key=lambda d: d.index):
+                if not isinstance(item.embedding, list):
+                    raise ValueError(f"Unexpected embedding type: {type(item.embedding)}")
+                embeddings.append(item.embedding)
+        return embeddings
+
     def close(self) -> None:
         """Close the underlying credential if it supports closing."""
         if hasattr(self._credential, "close"):
@@ -26,6 +26,9 @@ from ._stop_words import FULLTEXT_STOP_WORDS
 
 logger = logging.getLogger(__name__)
 
+# Word tokens for stop-word filtering (\w+ runs are already bounded by \b)
+_WORD_PATTERN = re.compile(r"\w+")
+
 
 class FulltextRetrieverModel(BaseModel):
     """Pydantic model for FulltextRetriever configuration validation."""
@@ -145,9 +148,8 @@ class FulltextRetriever(Retriever):
         Returns:
             Space-separated keywords with stop words removed.
         """
-        words = re.findall(r"\b\w+\b", text.lower())
-        keywords = [w for w in words if w not in FULLTEXT_STOP_WORDS and len(w) > 1]
-        return " ".join(keywords)
+        stop_words = FULLTEXT_STOP_WORDS
+        return " ".join(w for w in _WORD_PATTERN.findall(text.lower()) if len(w) > 1 and w not in stop_words)
 
     def default_record_formatter(self, record: neo4j.Record) -> RetrieverResultItem:
         """
@@ -186,7 +188,7 @@ class FulltextRetriever(Retriever):
         # Apply stop word filtering if enabled
         if self.filter_stop_words:
             search_text = self._extract_keywords(query_text)
-            if not search_text.strip():
+            if not search_text:
                 # No keywords found after filtering - return empty results
                 return RawSearchResult(records=[], metadata={"query_text": query_text})
         else:
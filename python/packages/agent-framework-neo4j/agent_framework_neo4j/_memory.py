@@ -8,15 +8,75 @@ in Neo4j with scoping for multi-tenancy support.
 from __future__ import annotations
 
 import asyncio
+import functools
+import logging
+import operator
+import os
+import re
 import uuid
-from dataclasses import dataclass
+from collections.abc import Callable, Set
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, NamedTuple, TypeVar
 
 import neo4j
+import numpy as np
 from agent_framework import ChatMessage
 from neo4j_graphrag.embeddings import Embedder
 
+from ._cache import CachedEmbedder
+
+logger = logging.getLogger(__name__)
+
+# Maximum memory rows written per transaction; bounds server-side
+# transaction memory for very long turns (e.g. large tool transcripts)
+STORE_BATCH_SIZE = 1000
+
+# Texts per embed_documents call; batches are sorted by length first so
+# each request pads its inputs to a similar length
+EMBED_BATCH_SIZE = 32
+
+# Stores of more rows than this use CALL (...) { ... } IN CONCURRENT
+# TRANSACTIONS on servers that support it (Neo4j 5.23+, for the variable
+# scope clause), committing CONCURRENT_WRITE_ROWS
+# rows per inner transaction on parallel server threads
+CONCURRENT_WRITE_THRESHOLD = 500
+CONCURRENT_WRITE_ROWS = 200
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# db.index.vector.queryNodes() cannot filter during the ANN search, so scope
+# filters are applied afterwards. Fetch this many candidates per requested
+# result so scoped searches still return top_k rows in multi-tenant stores.
+VECTOR_CANDIDATE_MULTIPLIER = 10
+
+# Scope fields in bit order: bit i of ScopeFilter._mask is set when
+# SCOPE_FIELDS[i] has a value
+SCOPE_FIELDS = ("application_id", "agent_id", "user_id", "thread_id")
+
+# Bit per storable message role; MemoryManager keeps the configured roles
+# as a mask so per-message filtering is a dict lookup and an AND
+ROLE_BITS = {"user": 1, "assistant": 2, "system": 4}
+
+
+@functools.lru_cache(maxsize=8)
+def _scope_where_clauses(alias: str) -> tuple[str, ...]:
+    """Pre-build the WHERE clause for every combination of scope fields.
+
+    Args:
+        alias: The node alias to use in the WHERE clause.
+
+    Returns:
+        Tuple of 16 WHERE clauses indexed by ScopeFilter._mask.
+    """
+    clauses: list[str] = []
+    for mask in range(1 << len(SCOPE_FIELDS)):
+        conditions = [f"{alias}.{name} = ${name}" for bit, name in enumerate(SCOPE_FIELDS) if mask & (1 << bit)]
+        clauses.append(" AND ".join(conditions) if conditions else "1=1")
+    return tuple(clauses)
+
 
 @dataclass(frozen=True, slots=True)
 class ScopeFilter:
@@ -33,6 +93,26 @@ class ScopeFilter:
     agent_id: str | None = None
     user_id: str | None = None
     thread_id: str | None = None
+    # Bitmask of set scope fields (see SCOPE_FIELDS) and the matching
+    # Cypher parameters, computed once
+    _mask: int = field(default=0, init=False, repr=False, compare=False)
+    _params: dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        mask = 0
+        params: dict[str, Any] = {}
+        for bit, name in enumerate(SCOPE_FIELDS):
+            value = getattr(self, name)
+            if value:
+                mask |= 1 << bit
+                params[name] = value
+        object.__setattr__(self, "_mask", mask)
+        object.__setattr__(self, "_params", params)
+
+    @property
+    def has_any_scope(self) -> bool:
+        """Check if at least one scope field is set."""
+        return self._mask != 0
 
     def to_cypher_where(self, alias: str = "m") -> tuple[str, dict[str, Any]]:
         """Build Cypher WHERE clause and parameters for scoping filters.
@@ -41,26 +121,130 @@ class ScopeFilter:
             alias: The node alias to use in the WHERE clause.
 
         Returns:
-            Tuple of (WHERE clause string, parameters dict).
+            Tuple of (WHERE clause string, parameters dict). The dict is a
+            fresh copy that callers may extend.
         """
-        conditions: list[str] = []
-        params: dict[str, Any] = {}
+        return _scope_where_clauses(alias)[self._mask], self._params.copy()
+
+
+def _quantize_int8(embeddings: list[list[float]]) -> list[list[int]]:
+    """Scale each embedding to the int8 range and round it.
+
+    Cosine similarity ignores vector length, so the per-vector scale is
+    dropped: the vector index stores the integers as floats and ranks them
+    like the original embeddings. Small integers are packed into one or
+    two bytes on the wire instead of nine for a float.
+
+    Args:
+        embeddings: Embeddings to quantize, all of the same dimension.
+
+    Returns:
+        One list of integers in [-127, 127] per embedding.
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1, keepdims=True) / 127.0
+    scales[scales == 0.0] = 1.0
+    quantized: list[list[int]] = np.rint(vectors / scales).astype(np.int8).tolist()
+    return quantized
+
+
+def _batch_embed_fn(embedder: Embedder) -> Callable[[list[str]], list[list[float]]] | None:
+    """Resolve the batch embedding call of an embedder, if it has one.
+
+    Embedders exposing ``embed_documents`` (e.g. AzureAIEmbedder) embed the
+    batch in a single request. Returns None for embedders that only have
+    ``embed_query``, including a CachedEmbedder wrapping one, whose own
+    ``embed_documents`` would embed the texts one after another.
+    """
+    inner = embedder.embedder if isinstance(embedder, CachedEmbedder) else embedder
+    if getattr(inner, "embed_documents", None) is None:
+        return None
+    embed_documents = embedder.embed_documents  # type: ignore[attr-defined]
+    return lambda texts: list(embed_documents(texts))
+
+
+def _server_version(agent: str) -> tuple[int, int]:
+    """Parse (major, minor) from a server agent string like "Neo4j/5.21.0".
+
+    Unrecognized agents parse as (0, 0) so version-gated features stay off.
+    """
+    match = re.match(r"Neo4j/(\d+)\.(\d+)", agent)
+    if match is None:
+        return (0, 0)
+    return (int(match.group(1)), int(match.group(2)))
+
+
+def _role_value(role: Any) -> str:
+    """Get the string value of a message role (Role object or plain string)."""
+    return str(getattr(role, "value", role))
+
+
+async def _run_statements(tx: neo4j.AsyncManagedTransaction, statements: list[str]) -> None:
+    """Run statements in order inside a managed transaction."""
+    for statement in statements:
+        result = await tx.run(statement.strip())
+        await result.consume()
+
 
-        if self.application_id:
-            conditions.append(f"{alias}.application_id = $application_id")
-            params["application_id"] = self.application_id
-        if self.agent_id:
-            conditions.append(f"{alias}.agent_id = $agent_id")
-            params["agent_id"] = self.agent_id
-        if self.user_id:
-            conditions.append(f"{alias}.user_id = $user_id")
-            params["user_id"] = self.user_id
-        if self.thread_id:
-            conditions.append(f"{alias}.thread_id = $thread_id")
-            params["thread_id"] = self.thread_id
+async def _run_index_statements(driver: neo4j.AsyncDriver, statements: list[str]) -> None:
+    """Run index DDL in one write transaction.
 
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
-        return where_clause, params
+    One round-trip and commit instead of one per statement, with
+    DROP/CREATE order kept.
+
+    Raises:
+        ValueError: If vector index creation isn't supported by the server.
+    """
+    async with driver.session() as session:
+        try:
+            await session.execute_write(_run_statements, statements)
+        except Exception as e:
+            # Provide helpful error for common issues
+            error_msg = str(e).lower()
+            if "vector" in error_msg and "not supported" in error_msg:
+                raise ValueError(f"Vector index creation failed. Neo4j 5.13+ required. Original error: {e}") from e
+            raise
+
+
+async def _write_batch(driver: neo4j.AsyncDriver, cypher: str, memories: list[dict[str, Any]]) -> None:
+    """Write one batch of memory rows in its own session."""
+    async with driver.session() as session:
+        await session.execute_write(_write_memories, cypher, memories)
+
+
+async def _write_memories(
+    tx: neo4j.AsyncManagedTransaction,
+    cypher: str,
+    memories: list[dict[str, Any]],
+) -> None:
+    """Run a memory write query for a batch of memory rows."""
+    result = await tx.run(cypher, {"memories": memories})
+    await result.consume()
+
+
+class MemoryRecord(NamedTuple):
+    """A recalled memory, in the column order of the memory search queries."""
+
+    text: str | None
+    role: str | None
+    timestamp: str | None
+    score: float | None
+
+
+async def _collect_memories(result: neo4j.AsyncResult, top_k: int) -> list[MemoryRecord]:
+    """Collect up to top_k records from a memory search result."""
+    # Stream records and stop at top_k rather than buffering the whole
+    # result; consume() discards anything left on the wire
+    memories: list[MemoryRecord] = []
+    make = MemoryRecord._make
+    async for record in result:
+        # Records iterate over their values in RETURN order, so they fill
+        # the tuple positionally without building a per-row dict
+        memories.append(make(record))
+        if len(memories) >= top_k:
+            break
+    await result.consume()
+    return memories
 
 
 class MemoryManager:
@@ -74,11 +258,17 @@ class MemoryManager:
         self,
         *,
         memory_label: str = "Memory",
-        memory_roles: set[str],
+        memory_roles: Set[str],
         memory_vector_index_name: str = "memory_embeddings",
         memory_fulltext_index_name: str = "memory_fulltext",
         overwrite_memory_index: bool = False,
         embedder: Embedder | None = None,
+        embed_executor: Executor | None = None,
+        embed_min_length: int = 0,
+        quantize_embeddings: bool = False,
+        flush_interval: float = 0.0,
+        exact_search: bool = False,
+        embedding_dimensions: int | None = None,
     ) -> None:
         """Initialize the memory manager.
 
@@ -89,21 +279,68 @@ class MemoryManager:
             memory_fulltext_index_name: Name of fulltext index for memories.
             overwrite_memory_index: Recreate indexes even if they exist.
             embedder: Embedder for vector similarity search.
+            embed_executor: Thread pool that runs embedding calls; shared
+                with the provider so both draw from one worker limit. Uses
+                the event loop's default executor if None.
+            embed_min_length: Minimum stripped text length for a memory to
+                be embedded. Shorter memories are stored without an
+                embedding, so vector search doesn't return them.
+            quantize_embeddings: Send stored embeddings as int8-range
+                integers. Only valid with the cosine vector index.
+            flush_interval: Seconds to buffer stored memories so writes
+                from several store() calls share one transaction. 0 writes
+                on every call. Buffered memories are written early once
+                STORE_BATCH_SIZE rows are waiting, and by flush().
+            exact_search: Score every in-scope memory with
+                vector.similarity.cosine() (Neo4j 5.18+) instead of querying
+                the vector index. Exact, and never starved by the scope
+                filter, but cost grows with the memories in scope.
+            embedding_dimensions: Length of the embedder's vectors. When
+                set, ensure_indexes creates the vector index up front;
+                otherwise it is created from the first embedding stored or
+                searched.
         """
         self._memory_label = memory_label
-        self._memory_roles = memory_roles
+        self._memory_roles = frozenset(memory_roles)
+        self._roles_mask = functools.reduce(operator.or_, (ROLE_BITS.get(role, 0) for role in memory_roles), 0)
         self._memory_vector_index_name = memory_vector_index_name
         self._memory_fulltext_index_name = memory_fulltext_index_name
         self._overwrite_memory_index = overwrite_memory_index
         self._embedder = embedder
+        self._embed_executor = embed_executor
+        self._embed_min_length = embed_min_length
+        self._quantize_embeddings = quantize_embeddings
+        # Write-coalescing buffer, used when flush_interval > 0
+        self._flush_interval = flush_interval
+        self._pending_rows: list[dict[str, Any]] = []
+        self._pending_embeddings = False
+        self._flush_task: asyncio.Task[None] | None = None
+        self._exact_search = exact_search
         self._indexes_initialized = False
+        self._embedding_dimensions = embedding_dimensions
+        # Batch embedding callable, resolved once for the embedder
+        self._embed_batch = _batch_embed_fn(embedder) if embedder is not None else None
+        # Store queries keyed by (with_embeddings, concurrent)
+        self._store_queries = {
+            (with_embeddings, concurrent): self._build_store_query(with_embeddings, concurrent)
+            for with_embeddings in (False, True)
+            for concurrent in (False, True)
+        }
+        # Whether the server runs CALL IN CONCURRENT TRANSACTIONS, checked
+        # on the first large store
+        self._concurrent_writes: bool | None = None
+        # One search query per scope mask, built once since the label,
+        # index and search mode are fixed for the manager's lifetime
+        self._search_queries = tuple(
+            self._build_search_query(where_clause) for where_clause in _scope_where_clauses("m")
+        )
 
     @property
     def indexes_initialized(self) -> bool:
         """Check if memory indexes have been initialized."""
         return self._indexes_initialized
 
-    async def ensure_indexes(self, driver: neo4j.Driver) -> None:
+    async def ensure_indexes(self, driver: neo4j.AsyncDriver) -> None:
         """Create memory indexes if they don't exist (lazy initialization).
 
         Following the RedisProvider pattern, this method is called on first
@@ -111,12 +348,17 @@ class MemoryManager:
         Uses IF NOT EXISTS for idempotency.
 
         Creates:
-        - Vector index on Memory.embedding (if embedder configured)
+        - Vector index on Memory.embedding (if embedder configured and its
+          dimensions are known; otherwise it is created from the first
+          embedding stored or searched, see ``_ensure_vector_index``)
         - Fulltext index on Memory.text
         - Standard indexes on scoping fields (user_id, thread_id, etc.)
+        - Composite index on (application_id, thread_id, user_id) for
+          multi-field scope filters
+        - Composite index on (user_id, timestamp) for recent memories
 
         Args:
-            driver: Neo4j driver for database operations.
+            driver: Async Neo4j driver for database operations.
 
         Raises:
             ValueError: If index creation fails.
@@ -129,33 +371,11 @@ class MemoryManager:
         # Following modern Cypher syntax (no deprecated features)
         index_statements: list[str] = []
 
-        # Vector index (if embedder configured) - requires Neo4j 5.11+
-        if self._embedder is not None:
-            # Get embedding dimensions by generating a test embedding
-            test_embedding = await asyncio.to_thread(
-                self._embedder.embed_query, "test"
-            )
-            dimensions = len(test_embedding)
-
-            if self._overwrite_memory_index:
-                # Drop existing index first if overwrite requested
-                index_statements.append(
-                    f"DROP INDEX {self._memory_vector_index_name} IF EXISTS"
-                )
-
-            # Create vector index with proper configuration
-            # Note: Neo4j 5.11+ syntax for vector indexes
-            index_statements.append(f"""
-                CREATE VECTOR INDEX {self._memory_vector_index_name} IF NOT EXISTS
-                FOR (m:{self._memory_label})
-                ON m.embedding
-                OPTIONS {{
-                    indexConfig: {{
-                        `vector.dimensions`: {dimensions},
-                        `vector.similarity_function`: 'cosine'
-                    }}
-                }}
-            """)
+        # Vector index (if embedder configured). Its dimensions come from a
+        # real embedding, so it is only created here once they are known
+        # rather than paying for a probe embedding on every connect.
+        if self._embedder is not None and self._embedding_dimensions is not None:
+            index_statements.extend(self._vector_index_statements(self._embedding_dimensions))
 
         # Fulltext index on text property
         if self._overwrite_memory_index:
@@ -171,38 +391,89 @@ class MemoryManager:
 
         # Standard indexes on scoping fields for efficient filtering
         scoping_fields = ["user_id", "thread_id", "agent_id", "application_id"]
-        for field in scoping_fields:
-            index_name = f"memory_{field}"
+        for scope_field in scoping_fields:
+            index_name = f"memory_{scope_field}"
             if self._overwrite_memory_index:
                 index_statements.append(f"DROP INDEX {index_name} IF EXISTS")
             index_statements.append(f"""
                 CREATE INDEX {index_name} IF NOT EXISTS
                 FOR (m:{self._memory_label})
-                ON (m.{field})
+                ON (m.{scope_field})
             """)
 
-        # Execute index creation statements
-        def _execute_index_creation() -> None:
-            with driver.session() as session:
-                for statement in index_statements:
-                    try:
-                        session.run(statement.strip())
-                    except Exception as e:
-                        # Provide helpful error for common issues
-                        error_msg = str(e).lower()
-                        if "vector" in error_msg and "not supported" in error_msg:
-                            raise ValueError(
-                                f"Vector index creation failed. Neo4j 5.11+ required. "
-                                f"Original error: {e}"
-                            ) from e
-                        raise
-
-        await asyncio.to_thread(_execute_index_creation)
+        # Composite index for the common multi-tenant scope combination
+        if self._overwrite_memory_index:
+            index_statements.append("DROP INDEX memory_scope IF EXISTS")
+        index_statements.append(f"""
+            CREATE INDEX memory_scope IF NOT EXISTS
+            FOR (m:{self._memory_label})
+            ON (m.application_id, m.thread_id, m.user_id)
+        """)
+
+        # Composite index for the recency fallback: equality on user_id plus
+        # timestamp order lets the planner read the newest top_k entries
+        # from the index instead of sorting every memory of the user. ISO
+        # timestamps with a fixed UTC offset sort chronologically as strings.
+        if self._overwrite_memory_index:
+            index_statements.append("DROP INDEX memory_user_recency IF EXISTS")
+        index_statements.append(f"""
+            CREATE INDEX memory_user_recency IF NOT EXISTS
+            FOR (m:{self._memory_label})
+            ON (m.user_id, m.timestamp)
+        """)
+
+        await _run_index_statements(driver, index_statements)
         self._indexes_initialized = True
 
+    async def _ensure_vector_index(self, driver: neo4j.AsyncDriver, dimensions: int) -> None:
+        """Create the memory vector index once the embedding dimensions are known.
+
+        Called with the first embedding a store or search has in hand, so
+        learning the dimensions costs no extra embedder call.
+
+        Args:
+            driver: Async Neo4j driver for database operations.
+            dimensions: Length of the embedder's vectors.
+
+        Raises:
+            ValueError: If index creation fails.
+        """
+        if self._embedding_dimensions is not None:
+            return
+        await _run_index_statements(driver, self._vector_index_statements(dimensions))
+        # The embedder is fixed for the manager's lifetime, so its
+        # dimensions are too
+        self._embedding_dimensions = dimensions
+
+    def _vector_index_statements(self, dimensions: int) -> list[str]:
+        """Build the DDL for the memory vector index.
+
+        Requires Neo4j 5.13+, which the store query's
+        db.create.setNodeVectorProperty also needs.
+        """
+        statements: list[str] = []
+        if self._overwrite_memory_index:
+            # Drop existing index first if overwrite requested
+            statements.append(f"DROP INDEX {self._memory_vector_index_name} IF EXISTS")
+
+        # Create vector index with proper configuration
+        # Note: Neo4j 5.11+ syntax for vector indexes
+        statements.append(f"""
+            CREATE VECTOR INDEX {self._memory_vector_index_name} IF NOT EXISTS
+            FOR (m:{self._memory_label})
+            ON m.embedding
+            OPTIONS {{
+                indexConfig: {{
+                    `vector.dimensions`: {dimensions},
+                    `vector.similarity_function`: 'cosine'
+                }}
+            }}
+        """)
+        return statements
+
     async def store(
         self,
-        driver: neo4j.Driver,
+        driver: neo4j.AsyncDriver,
         messages: list[ChatMessage],
         scope: ScopeFilter,
     ) -> None:
@@ -212,137 +483,376 @@ class MemoryManager:
         Optionally generates embeddings if an embedder is configured.
 
         Args:
-            driver: Neo4j driver for database operations.
+            driver: Async Neo4j driver for database operations.
             messages: List of ChatMessage objects to store.
             scope: Scoping filter for memory isolation.
         """
         if not messages:
             return
 
+        # One timestamp per batch: all messages were produced by the same
+        # invocation, and this avoids a tz-aware datetime per message
+        timestamp = datetime.now(timezone.utc).isoformat()
+
         # Filter to configured roles with non-empty text
-        memories_to_store: list[dict[str, Any]] = []
-        for msg in messages:
-            role_value = msg.role.value if hasattr(msg.role, "value") else str(msg.role)
-            if role_value not in self._memory_roles:
-                continue
-            if not msg.text or not msg.text.strip():
-                continue
-
-            memory_data: dict[str, Any] = {
-                "id": str(uuid.uuid4()),
-                "text": msg.text,
-                "role": role_value,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                # Scoping fields from ScopeFilter
-                "application_id": scope.application_id,
-                "agent_id": scope.agent_id,
-                "user_id": scope.user_id,
-                "thread_id": scope.thread_id,
-            }
-
-            # Add optional message metadata if available
-            if hasattr(msg, "message_id") and msg.message_id:
-                memory_data["message_id"] = msg.message_id
-            if hasattr(msg, "author_name") and msg.author_name:
-                memory_data["author_name"] = msg.author_name
-
-            memories_to_store.append(memory_data)
-
-        if not memories_to_store:
+        role_bit = ROLE_BITS.get
+        roles_mask = self._roles_mask
+        selected = [
+            (msg, role_value)
+            for msg in messages
+            if role_bit(role_value := _role_value(msg.role), 0) & roles_mask and msg.text and not msg.text.isspace()
+        ]
+        if not selected:
             return
 
-        # Generate embeddings if embedder is configured (for vector search on memories)
+        # Stores larger than STORE_BATCH_SIZE rows are pipelined in segments:
+        # the next segment embeds while the current one is written, with at
+        # most one segment embedding ahead of the writer. Buffered stores
+        # are written later, so they are embedded in one segment.
+        segment_size = len(selected)
+        if self._flush_interval <= 0 and segment_size > STORE_BATCH_SIZE:
+            segment_size = STORE_BATCH_SIZE
+        segment_count = -(-len(selected) // segment_size)
+
+        # Texts shorter than embed_min_length (acknowledgements like "ok")
+        # are stored without an embedding
+        embed_segments: list[list[int]] = [[] for _ in range(segment_count)]
         if self._embedder is not None:
-            # neo4j-graphrag embedders are sync, wrap with asyncio.to_thread
-            for memory in memories_to_store:
-                memory["embedding"] = await asyncio.to_thread(
-                    self._embedder.embed_query, memory["text"]
+            min_length = self._embed_min_length
+            for i, (msg, _) in enumerate(selected):
+                if min_length == 0 or len(msg.text.strip()) >= min_length:
+                    embed_segments[i // segment_size].append(i)
+
+        # Start embedding (for vector search on memories) before building
+        # the rows so the worker thread runs while the rows are assembled
+        embed_task = self._start_embedding(selected, embed_segments[0])
+        if embed_task is not None:
+            # Yield once so the task hands the batch to its thread now
+            await asyncio.sleep(0)
+
+        try:
+            # Each row holds exactly the properties to set on its node
+            memories_to_store: list[dict[str, Any]] = []
+            scope_fields = scope._params
+            # Random bytes for every memory's UUID from a single urandom call
+            id_bytes = os.urandom(16 * len(selected))
+            for offset, (msg, role_value) in zip(range(0, len(id_bytes), 16), selected, strict=True):
+                memory_data: dict[str, Any] = {
+                    "id": str(uuid.UUID(bytes=id_bytes[offset : offset + 16], version=4)),
+                    "text": msg.text,
+                    "role": role_value,
+                    "timestamp": timestamp,
+                    # Scoping fields from ScopeFilter; unset fields are left out
+                    # rather than sent as nulls (SET of a missing key is a no-op)
+                    **scope_fields,
+                }
+
+                # Add optional message metadata if available
+                message_id = getattr(msg, "message_id", None)
+                if message_id:
+                    memory_data["message_id"] = message_id
+                author_name = getattr(msg, "author_name", None)
+                if author_name:
+                    memory_data["author_name"] = author_name
+
+                memories_to_store.append(memory_data)
+
+            for k, embed_rows in enumerate(embed_segments):
+                if embed_task is not None:
+                    embeddings = await embed_task
+                    await self._ensure_vector_index(driver, len(embeddings[0]))
+                    payload = _quantize_int8(embeddings) if self._quantize_embeddings else embeddings
+                    for i, embedding in zip(embed_rows, payload, strict=True):
+                        memories_to_store[i]["embedding"] = embedding
+                embed_task = self._start_embedding(selected, embed_segments[k + 1]) if k + 1 < segment_count else None
+                if self._flush_interval <= 0:
+                    start = k * segment_size
+                    await self._write_rows(driver, memories_to_store[start : start + segment_size], bool(embed_rows))
+        except BaseException:
+            if embed_task is not None:
+                embed_task.cancel()
+            raise
+
+        if self._flush_interval > 0:
+            # Rows carry their own scope and properties, and the embedding
+            # query skips rows without one, so rows from different calls can
+            # share one query
+            self._pending_rows.extend(memories_to_store)
+            self._pending_embeddings |= bool(embed_segments[0])
+            if len(self._pending_rows) >= STORE_BATCH_SIZE:
+                await self.flush(driver)
+            elif self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_later(driver))
+
+    def _start_embedding(
+        self, selected: list[tuple[ChatMessage, str]], rows: list[int]
+    ) -> asyncio.Task[list[list[float]]] | None:
+        """Start embedding the texts of the given selected rows, if any."""
+        if not rows:
+            return None
+        return asyncio.create_task(self._embed_texts([selected[i][0].text for i in rows]))
+
+    async def flush(self, driver: neo4j.AsyncDriver) -> None:
+        """Write memories buffered by store() when flush_interval is set.
+
+        Args:
+            driver: Async Neo4j driver for database operations.
+        """
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+        self._flush_task = None
+        rows, with_embeddings = self._pending_rows, self._pending_embeddings
+        self._pending_rows = []
+        self._pending_embeddings = False
+        if rows:
+            await self._write_rows(driver, rows, with_embeddings)
+
+    async def _flush_later(self, driver: neo4j.AsyncDriver) -> None:
+        """Flush the buffer once flush_interval has elapsed."""
+        await asyncio.sleep(self._flush_interval)
+        try:
+            await self.flush(driver)
+        except Exception:
+            logger.exception("Buffered memory write failed")
+
+    async def _write_rows(
+        self, driver: neo4j.AsyncDriver, memories: list[dict[str, Any]], with_embeddings: bool
+    ) -> None:
+        """Write memory rows, setting embeddings when any row carries one."""
+        if len(memories) > CONCURRENT_WRITE_THRESHOLD and await self._supports_concurrent_writes(driver):
+            # CALL IN TRANSACTIONS needs an auto-commit transaction; the
+            # server splits the rows into inner transactions itself
+            batches: list[tuple[bool, list[dict[str, Any]]]] = [(False, memories)]
+            if with_embeddings:
+                # The concurrent embedding query sets the vector on every
+                # row, so rows stored without one are written separately
+                embedded = [memory for memory in memories if memory.get("embedding") is not None]
+                plain = [memory for memory in memories if memory.get("embedding") is None]
+                batches = [(True, embedded), (False, plain)]
+            async with driver.session() as session:
+                for batch_embeddings, rows in batches:
+                    if rows:
+                        result = await session.run(self._store_queries[batch_embeddings, True], {"memories": rows})
+                        await result.consume()
+            return
+
+        cypher = self._store_queries[with_embeddings, False]
+
+        # Managed write transactions: retried by the driver on transient
+        # errors and routed to the leader in clusters. Large stores are
+        # split so no single transaction holds an unbounded batch; every row
+        # creates a fresh node, so the batches share no locks and are written
+        # in parallel, one session each (sessions aren't concurrency-safe).
+        await asyncio.gather(
+            *(
+                _write_batch(driver, cypher, memories[start : start + STORE_BATCH_SIZE])
+                for start in range(0, len(memories), STORE_BATCH_SIZE)
+            )
+        )
+
+    async def _run_embedding(self, func: Callable[[T], R], arg: T) -> R:
+        """Run a sync embedding call on the embedding executor."""
+        return await asyncio.get_running_loop().run_in_executor(self._embed_executor, func, arg)
+
+    async def _embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """Embed a batch of texts on the embedding executor.
+
+        neo4j-graphrag embedders are sync. Embedders with a batch API get
+        the texts sorted by length and split into micro-batches of
+        ``EMBED_BATCH_SIZE``, so each request holds texts of similar length
+        and wastes little padding; results are scattered back to input
+        order. For the rest, one ``embed_query`` call per text is fanned
+        out across the executor's workers, so the batch takes about as long
+        as its slowest call rather than the sum. The batch method is
+        resolved once at construction (see ``_batch_embed_fn``). Repeated
+        texts (e.g. a recurring system prompt) are embedded once.
+
+        Args:
+            texts: Texts to embed.
+
+        Returns:
+            One embedding per input text, in order.
+
+        Raises:
+            ValueError: If no embedder is configured or the embedder returns
+                a different number of embeddings than texts.
+        """
+        if self._embedder is None:
+            raise ValueError("Embedder not configured")
+        unique = list(dict.fromkeys(texts))
+        if len(unique) < len(texts):
+            by_text = dict(zip(unique, await self._embed_texts(unique), strict=True))
+            return [by_text[text] for text in texts]
+        if self._embed_batch is not None:
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            by_length = [texts[i] for i in order]
+            batches = await asyncio.gather(
+                *(
+                    self._run_embedding(self._embed_batch, by_length[start : start + EMBED_BATCH_SIZE])
+                    for start in range(0, len(by_length), EMBED_BATCH_SIZE)
                 )
+            )
+            embeddings = [embedding for batch in batches for embedding in batch]
+            if len(embeddings) == len(texts):
+                restored: list[list[float]] = [[] for _ in texts]
+                for i, embedding in zip(order, embeddings, strict=True):
+                    restored[i] = embedding
+                embeddings = restored
+        else:
+            embed_query = self._embedder.embed_query
+            embeddings = list(await asyncio.gather(*(self._run_embedding(embed_query, text) for text in texts)))
+        # Guard against embedders that drop, merge or batch rows differently,
+        # which would otherwise attach vectors to the wrong memories
+        if len(embeddings) != len(texts):
+            raise ValueError(f"Embedder returned {len(embeddings)} embeddings for {len(texts)} texts")
+        return embeddings
+
+    def _build_store_query(self, with_embeddings: bool, concurrent: bool = False) -> str:
+        """Build the UNWIND store query.
+
+        Args:
+            with_embeddings: Whether to set embeddings carried by the rows.
+            concurrent: Whether to write the rows in CALL (...) { ... } IN
+                CONCURRENT TRANSACTIONS (Neo4j 5.23+, auto-commit only).
+                With embeddings, every row must carry one.
+
+        Returns:
+            Parameterized Cypher query string.
+        """
+        # Rows hold exactly the properties to set, so the whole map is
+        # written in one SET; the embedding is nulled out of the map (a null
+        # property isn't stored) and set below
+        if with_embeddings and concurrent:
+            # Every row has an embedding, so no filter is needed, and the
+            # label goes on last so the subquery ends in a write clause
+            # rather than the VOID procedure call
+            cypher = f"""
+        CREATE (m)
+        SET m = memory {{.*, embedding: null}}
+        WITH m, memory
+        CALL db.create.setNodeVectorProperty(m, 'embedding', memory.embedding)
+        SET m:{self._memory_label}"""
+        else:
+            cypher = f"""
+        CREATE (m:{self._memory_label})
+        SET m = memory {{.*, embedding: null}}"""
+        if with_embeddings and not concurrent:
+            # Store embeddings as a float32 vector property (what the vector
+            # index uses internally) rather than a list of 64-bit floats
+            cypher += """
+        WITH m, memory
+        WHERE memory.embedding IS NOT NULL
+        CALL db.create.setNodeVectorProperty(m, 'embedding', memory.embedding)"""
 
-        # Build Cypher query for creating Memory nodes
         # Use UNWIND for batch creation
-        cypher = f"""
+        if concurrent:
+            return f"""
         UNWIND $memories AS memory
-        CREATE (m:{self._memory_label})
-        SET m.id = memory.id,
-            m.text = memory.text,
-            m.role = memory.role,
-            m.timestamp = memory.timestamp,
-            m.application_id = memory.application_id,
-            m.agent_id = memory.agent_id,
-            m.user_id = memory.user_id,
-            m.thread_id = memory.thread_id
-        """
+        CALL (memory) {{{cypher}
+        }} IN CONCURRENT TRANSACTIONS OF {CONCURRENT_WRITE_ROWS} ROWS"""
+        return f"""
+        UNWIND $memories AS memory{cypher}"""
 
-        # Add optional fields if present
-        if any("message_id" in m for m in memories_to_store):
-            cypher += ",\n            m.message_id = memory.message_id"
-        if any("author_name" in m for m in memories_to_store):
-            cypher += ",\n            m.author_name = memory.author_name"
-        if any("embedding" in m for m in memories_to_store):
-            cypher += ",\n            m.embedding = memory.embedding"
+    async def _supports_concurrent_writes(self, driver: neo4j.AsyncDriver) -> bool:
+        """Check once whether the server supports IN CONCURRENT TRANSACTIONS."""
+        if self._concurrent_writes is None:
+            info = await driver.get_server_info()
+            self._concurrent_writes = _server_version(info.agent) >= (5, 23)
+        return self._concurrent_writes
 
-        # Execute in thread pool (neo4j driver is sync)
-        def _execute_write() -> None:
-            with driver.session() as session:
-                session.run(cypher, memories=memories_to_store)
+    def _build_search_query(self, where_clause: str) -> str:
+        """Build the memory search query for one scope WHERE clause.
 
-        await asyncio.to_thread(_execute_write)
+        Args:
+            where_clause: Scope filter clause using the ``m`` alias.
+
+        Returns:
+            Parameterized Cypher query string.
+        """
+        if self._embedder is not None and self._exact_search:
+            # Brute-force scoring over the scope-filtered memories, which the
+            # scope property indexes narrow before any similarity is computed
+            return f"""
+            MATCH (m:{self._memory_label})
+            WHERE {where_clause} AND m.embedding IS NOT NULL
+            WITH m, vector.similarity.cosine(m.embedding, $query_embedding) AS score
+            ORDER BY score DESC
+            LIMIT $top_k
+            RETURN m.text AS text, m.role AS role, m.timestamp AS timestamp, score
+            """
+        if self._embedder is not None:
+            # Use db.index.vector.queryNodes() for proper vector index search
+            # This is the recommended approach for Neo4j 5.11+. Over-fetch
+            # candidates so the scope filter doesn't starve the result set.
+            return f"""
+            CALL db.index.vector.queryNodes($index_name, $candidate_k, $query_embedding)
+            YIELD node AS m, score
+            WHERE {where_clause}
+            RETURN m.text AS text, m.role AS role, m.timestamp AS timestamp, score
+            ORDER BY score DESC
+            LIMIT $top_k
+            """
+        # Fallback: return recent memories by timestamp
+        return f"""
+            MATCH (m:{self._memory_label})
+            WHERE {where_clause}
+            WITH m
+            ORDER BY m.timestamp DESC
+            LIMIT $top_k
+            RETURN m.text AS text, m.role AS role, m.timestamp AS timestamp, 1.0 AS score
+            """
 
     async def search(
         self,
-        driver: neo4j.Driver,
+        driver: neo4j.AsyncDriver,
         query_text: str,
         scope: ScopeFilter,
         top_k: int,
-    ) -> list[dict[str, Any]]:
+        query_embedding: list[float] | None = None,
+    ) -> list[MemoryRecord]:
         """Search Memory nodes with scoping filters.
 
         Uses vector index search if embedder is configured, otherwise falls back
         to returning recent memories ordered by timestamp.
 
         Args:
-            driver: Neo4j driver for database operations.
+            driver: Async Neo4j driver for database operations.
             query_text: The query text to search for.
             scope: Scoping filter for memory isolation.
             top_k: Maximum number of results to return.
+            query_embedding: Precomputed embedding of query_text, e.g. one
+                already made for the knowledge graph search.
 
         Returns:
-            List of memory dictionaries with text and metadata.
+            MemoryRecord tuples (text, role, timestamp, score). Empty when
+            the scope has no fields set, since an unscoped search would read
+            every tenant's memories (and scan the whole label).
         """
-        where_clause, params = scope.to_cypher_where()
+        if not scope.has_any_scope:
+            return []
+
+        _, params = scope.to_cypher_where()
         params["top_k"] = top_k
 
         if self._embedder is not None:
             # Vector similarity search using Neo4j vector index
-            query_embedding = await asyncio.to_thread(
-                self._embedder.embed_query, query_text
-            )
+            if query_embedding is None:
+                query_embedding = await self._run_embedding(self._embedder.embed_query, query_text)
+            await self._ensure_vector_index(driver, len(query_embedding))
             params["query_embedding"] = query_embedding
-
-            # Use db.index.vector.queryNodes() for proper vector index search
-            # This is the recommended approach for Neo4j 5.11+
-            cypher = f"""
-            CALL db.index.vector.queryNodes($index_name, $top_k, $query_embedding)
-            YIELD node AS m, score
-            WHERE {where_clause}
-            RETURN m.text AS text, m.role AS role, m.timestamp AS timestamp, score
-            ORDER BY score DESC
-            """
-            params["index_name"] = self._memory_vector_index_name
-        else:
-            # Fallback: return recent memories by timestamp
-            cypher = f"""
-            MATCH (m:{self._memory_label})
-            WHERE {where_clause}
-            ORDER BY m.timestamp DESC
-            LIMIT $top_k
-            RETURN m.text AS text, m.role AS role, m.timestamp AS timestamp, 1.0 AS score
-            """
-
-        def _execute_read() -> list[dict[str, Any]]:
-            with driver.session() as session:
-                result = session.run(cypher, **params)
-                return [dict(record) for record in result]
-
-        return await asyncio.to_thread(_execute_read)
+            if not self._exact_search:
+                params["candidate_k"] = top_k * VECTOR_CANDIDATE_MULTIPLIER
+                params["index_name"] = self._memory_vector_index_name
+
+        cypher = self._search_queries[scope._mask]
+
+        # execute_query runs a managed read transaction (routed to a reader
+        # in clusters, retried on transient errors) without a session of
+        # our own to open and close per search
+        memories: list[MemoryRecord] = await driver.execute_query(
+            cypher,
+            params,
+            routing_=neo4j.RoutingControl.READ,
+            result_transformer_=functools.partial(_collect_memories, top_k=top_k),
+        )
+        return memories
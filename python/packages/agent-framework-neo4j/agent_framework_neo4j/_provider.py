@@ -11,8 +11,15 @@ and retrieving relevant past messages using semantic search.
 from __future__ import annotations
 
 import asyncio
+import functools
+import logging
+import os
 import sys
-from collections.abc import MutableSequence, Sequence
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, MutableSequence, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import neo4j
@@ -26,9 +33,10 @@ from neo4j_graphrag.retrievers import (
 )
 from neo4j_graphrag.types import RetrieverResult, RetrieverResultItem
 
-from ._config import DEFAULT_CONTEXT_PROMPT, IndexType, MemoryRole, ProviderConfig
+from ._cache import DEFAULT_EMBEDDING_CACHE_SIZE, QueryCache, get_cached_embedder
+from ._config import DEFAULT_CONTEXT_PROMPT, DEFAULT_MAX_CONCURRENT_SEARCHES, IndexType, MemoryRole, ProviderConfig
 from ._fulltext import FulltextRetriever
-from ._memory import MemoryManager, ScopeFilter
+from ._memory import MemoryManager, MemoryRecord, ScopeFilter
 from ._settings import Neo4jSettings
 
 if sys.version_info >= (3, 12):
@@ -37,9 +45,48 @@ else:
     from typing_extensions import Self, override
 
 
+logger = logging.getLogger(__name__)
+
 # Type alias for all supported retrievers
 RetrieverType = VectorRetriever | VectorCypherRetriever | HybridRetriever | HybridCypherRetriever | FulltextRetriever
 
+# Header placed before recalled memories in the context
+MEMORY_CONTEXT_PROMPT = "## Conversation Memory\nRelevant information from past conversations:"
+
+# Message roles whose text forms the search query (Role instances are not
+# singletons, so a hashed lookup replaces per-element __eq__ calls)
+_QUERY_ROLES = frozenset((Role.USER, Role.ASSISTANT))
+
+# Async search callable built once the retriever is connected
+SearchFn = Callable[[str, "list[float] | None"], Awaitable[RetrieverResult]]
+
+# Labels covered by the named indexes (SHOW INDEXES needs YIELD to filter)
+_INDEX_LABELS_QUERY = "SHOW INDEXES YIELD name, labelsOrTypes WHERE name IN $names RETURN labelsOrTypes"
+
+# Thread pools shared by every provider with the same pool size, so apps
+# creating a provider per request don't leave a pool of threads behind each
+_shared_executors: dict[tuple[str, int], ThreadPoolExecutor] = {}
+_shared_executors_lock = threading.Lock()
+
+
+def _get_shared_executor(thread_name_prefix: str, max_workers: int) -> ThreadPoolExecutor:
+    """Get the process-wide thread pool for a name prefix and size."""
+    key = (thread_name_prefix, max_workers)
+    with _shared_executors_lock:
+        executor = _shared_executors.get(key)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+            _shared_executors[key] = executor
+        return executor
+
+
+def _format_memory(memory: MemoryRecord) -> str:
+    """Format a recalled memory as a single context line."""
+    # Build each line in one pass rather than prefixing afterwards
+    text, role, timestamp, _ = memory
+    prefix = f"[{timestamp}] " if timestamp else ""
+    return f"{prefix}[{role or 'unknown'}]: {text or ''}"
+
 
 def _format_cypher_result(record: neo4j.Record) -> RetrieverResultItem:
     """
@@ -48,20 +95,19 @@ def _format_cypher_result(record: neo4j.Record) -> RetrieverResultItem:
     Extracts 'text' as content and all other fields as metadata.
     This provides proper parsing of custom retrieval query results.
     """
-    data = dict(record)
     # Extract text content (use 'text' field or first string field)
-    content = data.pop("text", None)
+    content = record.get("text")
+
+    # All remaining fields go to metadata (single pass, no intermediate copy)
+    metadata = {key: value for key, value in zip(record.keys(), record.values(), strict=True) if key != "text"}
+
     if content is None:
         # Fallback: use first string value found
-        for _key, value in data.items():
-            if isinstance(value, str):
-                content = value
-                break
+        content = next((value for value in metadata.values() if isinstance(value, str)), None)
     if content is None:
         content = str(record)
 
-    # All remaining fields go to metadata
-    return RetrieverResultItem(content=str(content), metadata=data if data else None)
+    return RetrieverResultItem(content=str(content), metadata=metadata or None)
 
 
 class Neo4jContextProvider(ContextProvider):
@@ -77,7 +123,8 @@ class Neo4jContextProvider(ContextProvider):
     - NO entity extraction - passes full message text to search
     - Index-driven configuration - works with any Neo4j index
     - Configurable enrichment - users define their own retrieval_query
-    - Async wrapping - neo4j-graphrag retrievers are sync, wrapped with asyncio.to_thread()
+    - Async wrapping - neo4j-graphrag retrievers are sync, run on a dedicated thread pool
+    - Native async memory I/O - memory reads/writes use the async Neo4j driver
     """
 
     def __init__(
@@ -87,6 +134,13 @@ class Neo4jContextProvider(ContextProvider):
         uri: str | None = None,
         username: str | None = None,
         password: str | None = None,
+        # Driver connection-pool tuning
+        max_connection_pool_size: int = 100,
+        connection_acquisition_timeout: float = 60.0,
+        connection_timeout: float = 30.0,
+        max_transaction_retry_time: float = 30.0,
+        max_connection_lifetime: float = 3600.0,
+        keep_alive: bool = True,
         # Index configuration (required)
         index_name: str | None = None,
         index_type: IndexType = "vector",
@@ -99,14 +153,28 @@ class Neo4jContextProvider(ContextProvider):
         retrieval_query: str | None = None,
         # Embedder for vector/hybrid search (neo4j-graphrag Embedder)
         embedder: Embedder | None = None,
+        max_concurrent_embeddings: int = 4,
+        max_concurrent_searches: int | None = None,
+        embedding_cache_size: int = DEFAULT_EMBEDDING_CACHE_SIZE,
         # Message history (like Azure AI Search's agentic mode)
         message_history_count: int = 10,
+        min_query_words: int = 0,
         # Fulltext search options
         filter_stop_words: bool | None = None,
+        # Retriever result cache (disabled by default)
+        cache_max_size: int = 0,
+        cache_ttl_seconds: float = 300.0,
+        cache_similarity_threshold: float = 0.97,
         # Memory configuration (Phase 1)
         memory_enabled: bool = False,
         memory_label: str = "Memory",
         memory_roles: tuple[MemoryRole, ...] = ("user", "assistant"),
+        background_memory_writes: bool = False,
+        memory_embed_min_length: int = 0,
+        quantize_memory_embeddings: bool = False,
+        memory_flush_interval: float = 0.0,
+        memory_exact_search: bool = False,
+        memory_embedding_dimensions: int | None = None,
         # Memory index configuration (Phase 1B - lazy initialization)
         overwrite_memory_index: bool = False,
         memory_vector_index_name: str = "memory_embeddings",
@@ -125,6 +193,14 @@ class Neo4jContextProvider(ContextProvider):
             uri: Neo4j connection URI. Falls back to NEO4J_URI env var.
             username: Neo4j username. Falls back to NEO4J_USERNAME env var.
             password: Neo4j password. Falls back to NEO4J_PASSWORD env var.
+            max_connection_pool_size: Maximum pooled connections. With memory
+                enabled it is split between the retrieval and memory drivers.
+            connection_acquisition_timeout: Seconds to wait for a pooled connection.
+            connection_timeout: Seconds to wait when opening a new connection.
+            max_transaction_retry_time: Seconds to retry managed transactions.
+            max_connection_lifetime: Seconds before a pooled connection is
+                retired; keep below any load balancer or firewall idle timeout.
+            keep_alive: Enable TCP keep-alive on driver connections.
             index_name: Name of the Neo4j index to query. Required.
                 For vector/hybrid: the vector index name.
                 For fulltext: the fulltext index name.
@@ -138,12 +214,59 @@ class Neo4jContextProvider(ContextProvider):
                 Must use `node` and `score` variables from index search.
             embedder: neo4j-graphrag Embedder for vector/hybrid search.
                 Required when index_type is "vector" or "hybrid".
+            max_concurrent_embeddings: Size of the embedding thread pool,
+                i.e. the most embedding calls it runs at once. Keeps
+                concurrent turns from oversubscribing CPU-bound local
+                embedders or rate-limited embedding APIs. Providers with the
+                same size share one pool. Default: 4.
+            max_concurrent_searches: Size of the thread pool for the sync
+                neo4j-graphrag retriever searches, i.e. the most index
+                searches it runs at once. Providers with the same size share
+                one pool. Falls back to NEO4J_MAX_CONCURRENT_SEARCHES env
+                var. Default: 32.
+            embedding_cache_size: Maximum texts whose embeddings are kept so
+                repeated queries and memory texts skip the embedder. Shared
+                by providers using the same embedder instance and size.
+                0 disables the cache. Default: 4096.
             message_history_count: Number of recent messages to use for query.
+            min_query_words: Skip retrieval when the query (the joined recent
+                messages) has fewer words than this. Default: 0 (never skip).
             filter_stop_words: Filter common stop words from fulltext queries.
                 Defaults to True for fulltext indexes, False otherwise.
+            cache_max_size: Maximum number of cached search results. 0 disables
+                the cache. Vector/hybrid results are matched by query embedding
+                similarity; fulltext results by exact query text.
+            cache_ttl_seconds: Time-to-live for cached search results.
+            cache_similarity_threshold: Minimum cosine similarity between query
+                embeddings for a cached vector/hybrid result to be reused.
             memory_enabled: Enable storing conversation messages as Memory nodes.
             memory_label: Node label for stored memories. Default: "Memory".
             memory_roles: Which message roles to store. Default: ("user", "assistant").
+            background_memory_writes: Store memories in a background task so
+                invoked() returns before the write commits. Pending writes
+                finish before the provider closes; a turn's memories may be
+                lost if the process exits first. Default: False.
+            memory_embed_min_length: Skip embedding memories whose text is
+                shorter than this (e.g. "ok", "thanks"). They are still stored,
+                but vector memory search won't return them. Default: 0.
+            quantize_memory_embeddings: Round stored memory embeddings to
+                int8-range integers, cutting the Bolt payload per vector
+                roughly 8x. Ranking is unchanged up to rounding because the
+                memory index uses cosine similarity. Default: False.
+            memory_flush_interval: Buffer stored memories for this many
+                seconds so several turns are written in one transaction.
+                Buffered memories aren't searchable until written and are
+                flushed when the provider closes. 0 writes every turn.
+                Default: 0.
+            memory_exact_search: Rank in-scope memories by exact cosine
+                similarity instead of the vector index (requires Neo4j
+                5.18+). Suits small per-user memory sets, where the index's
+                post-filtering by scope can return fewer than top_k results.
+                Default: False.
+            memory_embedding_dimensions: Length of the embedder's vectors,
+                used to create the memory vector index on connect. When
+                None, the index is created from the first memory embedding
+                stored or searched. Default: None.
             overwrite_memory_index: Recreate memory indexes even if they exist.
             memory_vector_index_name: Name of vector index for memories.
             memory_fulltext_index_name: Name of fulltext index for memories.
@@ -156,26 +279,48 @@ class Neo4jContextProvider(ContextProvider):
         Raises:
             ValueError: If required configuration is missing or invalid.
         """
-        # Load settings from environment (single source of truth)
-        settings = Neo4jSettings()
-
-        # Build effective settings by merging constructor args with env settings
-        effective_uri = uri or settings.uri
-        effective_username = username or settings.username
-        effective_password = password or settings.get_password()
-        effective_index_name = index_name or settings.index_name
+        # Build effective settings by merging constructor args with env
+        # settings. Loading settings reads the environment, so skip it when
+        # every value was passed explicitly.
+        effective_uri: str | None = uri
+        effective_username: str | None = username
+        effective_password: str | None = password
+        effective_index_name: str | None = index_name
+        if not (uri and username and password and index_name):
+            settings = Neo4jSettings()
+            effective_uri = uri or settings.uri
+            effective_username = username or settings.username
+            effective_password = password or settings.get_password()
+            effective_index_name = index_name or settings.index_name
+        # A single env var, read directly so it doesn't force loading settings
+        if max_concurrent_searches is None:
+            raw_searches = os.environ.get("NEO4J_MAX_CONCURRENT_SEARCHES")
+            try:
+                max_concurrent_searches = (
+                    int(raw_searches) if raw_searches is not None else DEFAULT_MAX_CONCURRENT_SEARCHES
+                )
+            except ValueError:
+                raise ValueError(
+                    f"NEO4J_MAX_CONCURRENT_SEARCHES must be an integer, got {raw_searches!r}"
+                ) from None
 
-        # Validate index_name is provided (before Pydantic validation)
+        # Validate index_name is provided (before config validation)
         if not effective_index_name:
             raise ValueError(
                 "index_name is required. Set via constructor or NEO4J_INDEX_NAME env var."
             )
 
-        # Use Pydantic model for comprehensive validation
+        # Validate all options and their interdependencies
         self._config = ProviderConfig(
             uri=effective_uri,
             username=effective_username,
             password=effective_password,
+            max_connection_pool_size=max_connection_pool_size,
+            connection_acquisition_timeout=connection_acquisition_timeout,
+            connection_timeout=connection_timeout,
+            max_transaction_retry_time=max_transaction_retry_time,
+            max_connection_lifetime=max_connection_lifetime,
+            keep_alive=keep_alive,
             index_name=effective_index_name,
             index_type=index_type,
             fulltext_index_name=fulltext_index_name,
@@ -183,12 +328,25 @@ class Neo4jContextProvider(ContextProvider):
             top_k=top_k,
             context_prompt=context_prompt,
             message_history_count=message_history_count,
+            min_query_words=min_query_words,
             filter_stop_words=filter_stop_words,
+            cache_max_size=cache_max_size,
+            cache_ttl_seconds=cache_ttl_seconds,
+            cache_similarity_threshold=cache_similarity_threshold,
             embedder=embedder,
+            max_concurrent_embeddings=max_concurrent_embeddings,
+            max_concurrent_searches=max_concurrent_searches,
+            embedding_cache_size=embedding_cache_size,
             # Memory configuration
             memory_enabled=memory_enabled,
             memory_label=memory_label,
             memory_roles=memory_roles,
+            background_memory_writes=background_memory_writes,
+            memory_embed_min_length=memory_embed_min_length,
+            quantize_memory_embeddings=quantize_memory_embeddings,
+            memory_flush_interval=memory_flush_interval,
+            memory_exact_search=memory_exact_search,
+            memory_embedding_dimensions=memory_embedding_dimensions,
             # Memory index configuration
             overwrite_memory_index=overwrite_memory_index,
             memory_vector_index_name=memory_vector_index_name,
@@ -209,6 +367,7 @@ class Neo4jContextProvider(ContextProvider):
         self._top_k = self._config.top_k
         self._context_prompt = self._config.context_prompt
         self._message_history_count = self._config.message_history_count
+        self._min_query_words = self._config.min_query_words
 
         # Stop word filtering - default to True for fulltext, False otherwise
         if self._config.filter_stop_words is None:
@@ -216,10 +375,43 @@ class Neo4jContextProvider(ContextProvider):
         else:
             self._filter_stop_words = self._config.filter_stop_words
 
+        # Retriever result cache (None when disabled)
+        self._search_cache: QueryCache[RetrieverResult] | None = None
+        if self._config.cache_max_size > 0:
+            self._search_cache = QueryCache(
+                max_size=self._config.cache_max_size,
+                ttl_seconds=self._config.cache_ttl_seconds,
+                similarity_threshold=self._config.cache_similarity_threshold,
+            )
+
+        # Embeddings cached by exact text, shared by providers using the
+        # same embedder instance
+        self._embedder: Embedder | None = None
+        if self._config.embedder is not None:
+            self._embedder = (
+                get_cached_embedder(self._config.embedder, self._config.embedding_cache_size)
+                if self._config.embedding_cache_size > 0
+                else self._config.embedder
+            )
+        # Bounded pool for embedding calls (shared with memory), so they
+        # neither queue behind nor crowd out other to_thread work in the
+        # default executor. Threads start on first use; the pool is shared
+        # with other providers of the same size and lives for the process.
+        self._embed_executor = _get_shared_executor("neo4j-embed", self._config.max_concurrent_embeddings)
+        # Likewise for the sync retriever searches, which are I/O-bound and
+        # would otherwise share the default executor's min(32, cpus + 4)
+        # threads with everything else in the process
+        self._search_executor = _get_shared_executor("neo4j-search", self._config.max_concurrent_searches)
+        # Vector/hybrid search and memory search embed the same query text
+        self._share_query_embedding = (
+            self._config.memory_enabled and self._config.index_type != "fulltext" and self._embedder is not None
+        )
+
         # Memory configuration
         self._memory_enabled = self._config.memory_enabled
         self._memory_label = self._config.memory_label
-        self._memory_roles = set(self._config.memory_roles)
+        self._memory_roles = frozenset(self._config.memory_roles)
+        self._background_memory_writes = self._config.background_memory_writes
 
         # Memory index configuration (Phase 1B - lazy initialization)
         self._overwrite_memory_index = self._config.overwrite_memory_index
@@ -241,15 +433,43 @@ class Neo4jContextProvider(ContextProvider):
                 memory_vector_index_name=self._memory_vector_index_name,
                 memory_fulltext_index_name=self._memory_fulltext_index_name,
                 overwrite_memory_index=self._overwrite_memory_index,
-                embedder=self._config.embedder,
+                embedder=self._embedder,
+                embed_executor=self._embed_executor,
+                embed_min_length=self._config.memory_embed_min_length,
+                quantize_embeddings=self._config.quantize_memory_embeddings,
+                flush_interval=self._config.memory_flush_interval,
+                exact_search=self._config.memory_exact_search,
+                embedding_dimensions=self._config.memory_embedding_dimensions,
             )
         else:
             self._memory_manager = None
 
         # Runtime state
         self._driver: neo4j.Driver | None = None
+        # Async driver for memory operations (created only when memory is enabled)
+        self._async_driver: neo4j.AsyncDriver | None = None
         self._retriever: RetrieverType | None = None
+        # Search callable specialized for the retriever (set on connect)
+        self._search: SearchFn | None = None
         self._per_operation_thread_id: str | None = None
+        self._scope_filter: ScopeFilter | None = None
+        # Memory writes scheduled by invoked() that haven't finished yet
+        self._pending_writes: set[asyncio.Task[None]] = set()
+        # (query text, scope, context messages, expiry) from the last
+        # invoking() call; only kept when the result cache is enabled
+        self._last_context: tuple[str, ScopeFilter | None, tuple[ChatMessage, ...], float] | None = None
+        # Whether the retrieval index covers the memory label, so storing
+        # memories can change search results (checked on connect)
+        self._memory_in_retrieval_index = False
+        # Nesting depth of ``async with``; only the outermost enter/exit
+        # connects and disconnects
+        self._enter_count = 0
+
+    def _get_embedder(self) -> Embedder:
+        """Get the cached embedder (guaranteed set for vector/hybrid mode)."""
+        if self._embedder is None:
+            raise ValueError("embedder not set")
+        return self._embedder
 
     def _create_retriever(self) -> RetrieverType:
         """Create the appropriate neo4j-graphrag retriever based on configuration."""
@@ -265,14 +485,14 @@ class Neo4jContextProvider(ContextProvider):
                     driver=self._driver,
                     index_name=self._index_name,
                     retrieval_query=self._config.get_retrieval_query(),
-                    embedder=self._config.get_embedder(),
+                    embedder=self._get_embedder(),
                     result_formatter=_format_cypher_result,
                 )
             else:
                 return VectorRetriever(
                     driver=self._driver,
                     index_name=self._index_name,
-                    embedder=self._config.get_embedder(),
+                    embedder=self._get_embedder(),
                 )
 
         elif self._index_type == "hybrid":
@@ -282,7 +502,7 @@ class Neo4jContextProvider(ContextProvider):
                     vector_index_name=self._index_name,
                     fulltext_index_name=self._config.get_fulltext_index_name(),
                     retrieval_query=self._config.get_retrieval_query(),
-                    embedder=self._config.get_embedder(),
+                    embedder=self._get_embedder(),
                     result_formatter=_format_cypher_result,
                 )
             else:
@@ -290,7 +510,7 @@ class Neo4jContextProvider(ContextProvider):
                     driver=self._driver,
                     vector_index_name=self._index_name,
                     fulltext_index_name=self._config.get_fulltext_index_name(),
-                    embedder=self._config.get_embedder(),
+                    embedder=self._get_embedder(),
                 )
 
         else:  # fulltext
@@ -302,6 +522,25 @@ class Neo4jContextProvider(ContextProvider):
                 result_formatter=_format_cypher_result if use_graph_enrichment else None,
             )
 
+    def _retrieval_indexes_memory(self) -> bool:
+        """Check whether the retrieval index(es) cover the memory label."""
+        if self._driver is None:
+            raise ValueError("Driver not initialized")
+        names = [self._index_name]
+        if self._index_type == "hybrid":
+            names.append(self._config.get_fulltext_index_name())
+        try:
+            records, _, _ = self._driver.execute_query(
+                _INDEX_LABELS_QUERY,
+                {"names": names},
+                routing_=neo4j.RoutingControl.READ,
+            )
+        except neo4j.exceptions.Neo4jError:
+            # Can't tell (e.g. missing SHOW INDEX privilege), so assume it does
+            logger.debug("Could not read retrieval index labels", exc_info=True)
+            return True
+        return any(self._memory_label in (record["labelsOrTypes"] or ()) for record in records)
+
     @property
     def _effective_thread_id(self) -> str | None:
         """Resolve the active thread ID.
@@ -350,14 +589,29 @@ class Neo4jContextProvider(ContextProvider):
 
     @override
     async def __aenter__(self) -> Self:
-        """Connect to Neo4j and create retriever."""
+        """Connect to Neo4j and create retriever.
+
+        Re-entering an already connected provider (e.g. an agent entering a
+        provider the caller also holds open) reuses the open drivers and
+        retriever instead of reconnecting and re-fetching index metadata.
+        """
+        if self._enter_count:
+            self._enter_count += 1
+            return self
+
         # Get validated connection config (raises if not all set)
         uri, username, password = self._config.get_connection()
 
-        # Create driver
+        # Create driver; with memory enabled the async memory driver takes a
+        # share of the pool so the two together stay within the configured size
+        if self._memory_enabled:
+            driver_options, memory_driver_options = self._config.get_split_driver_options()
+        else:
+            driver_options = self._config.get_driver_options()
         self._driver = neo4j.GraphDatabase.driver(
             uri,
             auth=(username, password),
+            **driver_options,
         )
 
         # Verify connectivity (sync call wrapped for async)
@@ -366,7 +620,28 @@ class Neo4jContextProvider(ContextProvider):
         # Create retriever in thread pool because neo4j-graphrag retrievers
         # call _fetch_index_infos() during __init__ which makes DB calls
         self._retriever = await asyncio.to_thread(self._create_retriever)
+        self._search = self._make_search()
 
+        # Memory reads/writes are plain Cypher we own, so they run on the
+        # async driver instead of hopping through the thread pool
+        if self._memory_enabled:
+            self._async_driver = neo4j.AsyncGraphDatabase.driver(
+                uri,
+                auth=(username, password),
+                **memory_driver_options,
+            )
+
+            # Memory writes only need to drop cached search results when the
+            # retrieval index can return memory nodes
+            if self._search_cache is not None:
+                self._memory_in_retrieval_index = await asyncio.to_thread(self._retrieval_indexes_memory)
+
+            # Create memory indexes up front so the first turn doesn't pay for
+            # DDL (the vector index too when its dimensions are configured)
+            if self._memory_manager is not None:
+                await self._memory_manager.ensure_indexes(self._async_driver)
+
+        self._enter_count = 1
         return self
 
     @override
@@ -376,11 +651,23 @@ class Neo4jContextProvider(ContextProvider):
         exc_val: BaseException | None,
         exc_tb: Any,
     ) -> None:
-        """Close Neo4j connection."""
+        """Close Neo4j connections when the outermost context exits."""
+        if self._enter_count > 1:
+            self._enter_count -= 1
+            return
+        self._enter_count = 0
+        await self._wait_for_pending_writes()
+        if self._async_driver is not None:
+            if self._memory_manager is not None:
+                await self._memory_manager.flush(self._async_driver)
+            await self._async_driver.close()
+            self._async_driver = None
         if self._driver is not None:
             self._driver.close()
             self._driver = None
             self._retriever = None
+            self._search = None
+            self._last_context = None
 
     @property
     def is_connected(self) -> bool:
@@ -390,22 +677,24 @@ class Neo4jContextProvider(ContextProvider):
     def _format_retriever_result(self, result: RetrieverResult) -> list[str]:
         """Format neo4j-graphrag RetrieverResult items as text for context."""
         formatted: list[str] = []
+        format_field = self._format_field
 
         for item in result.items:
             parts: list[str] = []
+            metadata = item.metadata
 
-            # Include score if present in metadata
-            if item.metadata and "score" in item.metadata:
-                score = item.metadata["score"]
+            if metadata:
+                # Include score if present in metadata
+                score = metadata.get("score")
                 if score is not None:
                     parts.append(f"[Score: {score:.3f}]")
 
-            # Include other metadata fields
-            if item.metadata:
-                for key, value in item.metadata.items():
-                    if key == "score" or value is None:
-                        continue
-                    parts.append(self._format_field(key, value))
+                # Include other metadata fields; empty collections format to ""
+                parts.extend(
+                    field
+                    for key, value in metadata.items()
+                    if key != "score" and value is not None and (field := format_field(key, value))
+                )
 
             # Include content
             if item.content:
@@ -418,35 +707,105 @@ class Neo4jContextProvider(ContextProvider):
 
     def _format_field(self, key: str, value: Any) -> str:
         """Format a single field value, handling lists and scalars."""
-        # Try to treat as list first (duck typing)
-        try:
-            # Strings are iterable but we want them as scalars
-            if value == str(value):
-                return f"[{key}: {value}]"
-        except (TypeError, ValueError):
-            pass
-
-        # Try to iterate and join
-        try:
-            items = list(value)
-            if items:
-                return f"[{key}: {', '.join(str(v) for v in items)}]"
-            return ""
-        except TypeError:
-            # Not iterable, treat as scalar
+        # Strings are iterable but we want them as scalars
+        if isinstance(value, str):
             return f"[{key}: {value}]"
-
-    async def _execute_search(self, query_text: str) -> RetrieverResult:
-        """Execute search using the configured retriever."""
+        # Collections (e.g. collect() results) are joined; empty ones dropped
+        if isinstance(value, (list, tuple, set, frozenset)):
+            if not value:
+                return ""
+            return f"[{key}: {', '.join(map(str, value))}]"
+        return f"[{key}: {value}]"
+
+    def _make_search(self) -> SearchFn:
+        """Build the search callable for the connected retriever.
+
+        Configuration is fixed once connected, so the index type and cache
+        branches are resolved here and the retriever, top_k, cache and
+        embedder are bound as closure locals rather than re-read per call.
+
+        When the result cache is enabled, vector/hybrid queries are embedded
+        here so the embedding can serve as the cache key and be passed to the
+        retriever as ``query_vector`` (avoiding a second embedding call).
+        """
         if self._retriever is None:
             raise ValueError("Retriever not initialized")
 
-        # neo4j-graphrag retrievers are sync, wrap with asyncio.to_thread
-        return await asyncio.to_thread(
-            self._retriever.search,
-            query_text=query_text,
-            top_k=self._top_k,
-        )
+        retriever_search = self._retriever.search
+        top_k = self._top_k
+        cache = self._search_cache
+        include_text = self._index_type == "hybrid"
+        search_executor = self._search_executor
+
+        def run_search(**kwargs: Any) -> Awaitable[RetrieverResult]:
+            # neo4j-graphrag retrievers are sync, run on the search executor
+            return asyncio.get_running_loop().run_in_executor(
+                search_executor, functools.partial(retriever_search, top_k=top_k, **kwargs)
+            )
+
+        def search_by_vector(query_text: str, query_vector: list[float]) -> Awaitable[RetrieverResult]:
+            if include_text:
+                return run_search(query_text=query_text, query_vector=query_vector)
+            return run_search(query_vector=query_vector)
+
+        if cache is None:
+
+            async def search(query_text: str, query_vector: list[float] | None = None) -> RetrieverResult:
+                # Without a precomputed vector the retriever embeds the text itself
+                if query_vector is None:
+                    return await run_search(query_text=query_text)
+                return await search_by_vector(query_text, query_vector)
+
+            return search
+
+        index_name = self._index_name
+
+        if self._index_type == "fulltext":
+            # Fulltext search has no use for a query vector
+            async def search_fulltext_cached(
+                query_text: str, _query_vector: list[float] | None = None
+            ) -> RetrieverResult:
+                key = (index_name, top_k, query_text)
+                cached = cache.get(key)
+                if cached is not None:
+                    return cached
+                result = await run_search(query_text=query_text)
+                cache.put(key, result)
+                return result
+
+            return search_fulltext_cached
+
+        key = (index_name, top_k)
+        embed_query = self._embed_query
+
+        async def search_vector_cached(query_text: str, query_vector: list[float] | None = None) -> RetrieverResult:
+            if query_vector is None:
+                query_vector = await embed_query(query_text)
+            cached = cache.get(key, query_vector)
+            if cached is not None:
+                return cached
+            result = await search_by_vector(query_text, query_vector)
+            cache.put(key, result, query_vector)
+            return result
+
+        return search_vector_cached
+
+    async def _embed_query(self, query_text: str) -> list[float]:
+        """Embed a query on the embedding executor."""
+        embedder = self._get_embedder()
+        return await asyncio.get_running_loop().run_in_executor(self._embed_executor, embedder.embed_query, query_text)
+
+    async def _execute_search(self, query_text: str, query_vector: list[float] | None = None) -> RetrieverResult:
+        """Execute search using the configured retriever.
+
+        Args:
+            query_text: The query text to search for.
+            query_vector: Precomputed embedding of query_text, used instead
+                of embedding it again for vector/hybrid indexes.
+        """
+        if self._search is None:
+            raise ValueError("Retriever not initialized")
+        return await self._search(query_text, query_vector)
 
     def _get_scope_filter(self) -> ScopeFilter:
         """Build current scope filter from provider state.
@@ -454,12 +813,25 @@ class Neo4jContextProvider(ContextProvider):
         Returns:
             ScopeFilter with current scoping parameters.
         """
-        return ScopeFilter(
-            application_id=self.application_id,
-            agent_id=self.agent_id,
-            user_id=self.user_id,
-            thread_id=self._effective_thread_id,
-        )
+        # Reuse the last filter while the scope is unchanged; only the
+        # per-operation thread id normally varies between calls
+        thread_id = self._effective_thread_id
+        scope = self._scope_filter
+        if (
+            scope is None
+            or scope.thread_id != thread_id
+            or scope.user_id != self.user_id
+            or scope.agent_id != self.agent_id
+            or scope.application_id != self.application_id
+        ):
+            scope = ScopeFilter(
+                application_id=self.application_id,
+                agent_id=self.agent_id,
+                user_id=self.user_id,
+                thread_id=thread_id,
+            )
+            self._scope_filter = scope
+        return scope
 
     @property
     def _memory_indexes_initialized(self) -> bool:
@@ -468,24 +840,26 @@ class Neo4jContextProvider(ContextProvider):
             return False
         return self._memory_manager.indexes_initialized
 
-    async def _search_memories(self, query_text: str) -> list[dict[str, Any]]:
+    async def _search_memories(self, query_text: str, query_embedding: list[float] | None = None) -> list[MemoryRecord]:
         """Search Memory nodes with scoping filters (delegates to MemoryManager).
 
         Args:
             query_text: The query text to search for.
+            query_embedding: Precomputed embedding of query_text, if any.
 
         Returns:
-            List of memory dictionaries with text and metadata.
+            MemoryRecord tuples (text, role, timestamp, score).
         """
-        if self._driver is None or self._memory_manager is None:
+        if self._async_driver is None or self._memory_manager is None:
             return []
 
         scope = self._get_scope_filter()
         return await self._memory_manager.search(
-            driver=self._driver,
+            driver=self._async_driver,
             query_text=query_text,
             scope=scope,
             top_k=self._top_k,
+            query_embedding=query_embedding,
         )
 
     @override
@@ -507,53 +881,74 @@ class Neo4jContextProvider(ContextProvider):
         if not self.is_connected:
             return Context()
 
-        # Convert to list - handle both single message and sequence
-        if isinstance(messages, ChatMessage):
-            messages_list = [messages]
-        else:
-            messages_list = list(messages)
-
-        # Filter to USER and ASSISTANT messages with text
-        filtered_messages = [
-            msg
-            for msg in messages_list
-            if msg.text and msg.text.strip() and msg.role in [Role.USER, Role.ASSISTANT]
-        ]
-
-        if not filtered_messages:
+        # Handle both single message and sequence
+        messages_seq = (messages,) if isinstance(messages, ChatMessage) else messages
+
+        # Take the most recent USER and ASSISTANT messages with text (like
+        # Azure AI Search's agentic mode) in a single backwards pass that
+        # stops once message_history_count messages are found
+        history_count = self._message_history_count
+        recent_texts: deque[str] = deque()
+        for msg in reversed(messages_seq):
+            text = msg.text
+            if text and not text.isspace() and msg.role in _QUERY_ROLES:
+                recent_texts.appendleft(text)
+                if len(recent_texts) >= history_count:
+                    break
+
+        if not recent_texts:
             return Context()
 
-        # Take recent messages (like Azure AI Search's agentic mode)
-        recent_messages = filtered_messages[-self._message_history_count :]
-
         # CRITICAL: Concatenate full message text - NO ENTITY EXTRACTION
-        query_text = "\n".join(msg.text for msg in recent_messages if msg.text)
+        query_text = "\n".join(recent_texts)
 
-        if not query_text.strip():
+        # Too little text to retrieve anything meaningful for
+        min_words = self._min_query_words
+        if min_words and len(query_text.split(None, min_words - 1)) < min_words:
             return Context()
 
-        context_messages: list[ChatMessage] = []
+        # Same query and scope as the previous call (e.g. a retried run):
+        # with the result cache enabled, reuse its context until it expires
+        # instead of searching again
+        scope = self._get_scope_filter() if self._memory_enabled else None
+        last = self._last_context
+        if last is not None and last[0] == query_text and last[1] == scope and last[3] > time.monotonic():
+            return Context(messages=list(last[2]))
 
-        # Perform knowledge graph search using retriever
-        result = await self._execute_search(query_text)
-        if result.items:
-            context_messages.append(ChatMessage(role=Role.USER, text=self._context_prompt))
-            formatted_results = self._format_retriever_result(result)
-            for text in formatted_results:
-                if text:
-                    context_messages.append(ChatMessage(role=Role.USER, text=text))
+        context_messages: list[ChatMessage] = []
 
-        # Search memories if memory is enabled
+        # Knowledge graph search and memory search are independent
+        # round-trips, so run them concurrently when memory is enabled
+        memories: list[MemoryRecord] = []
         if self._memory_enabled:
-            memories = await self._search_memories(query_text)
-            if memories:
-                memory_prompt = "## Conversation Memory\nRelevant information from past conversations:"
-                context_messages.append(ChatMessage(role=Role.USER, text=memory_prompt))
-                for memory in memories:
-                    memory_text = f"[{memory.get('role', 'unknown')}]: {memory.get('text', '')}"
-                    if memory.get("timestamp"):
-                        memory_text = f"[{memory['timestamp']}] {memory_text}"
-                    context_messages.append(ChatMessage(role=Role.USER, text=memory_text))
+            # Both searches embed the same query with the same embedder, so
+            # embed it once up front and hand the vector to each
+            query_vector = await self._embed_query(query_text) if self._share_query_embedding else None
+            result, memories = await asyncio.gather(
+                self._execute_search(query_text, query_vector),
+                self._search_memories(query_text, query_vector),
+            )
+        else:
+            result = await self._execute_search(query_text)
+
+        # One message per section (prompt header plus its results) keeps
+        # the per-message envelope the LLM API adds to two at most
+        if result.items:
+            body = "\n\n".join(text for text in self._format_retriever_result(result) if text)
+            if body:
+                context_messages.append(ChatMessage(role=Role.USER, text=f"{self._context_prompt}\n\n{body}"))
+
+        if memories:
+            body = "\n".join(_format_memory(memory) for memory in memories)
+            context_messages.append(ChatMessage(role=Role.USER, text=f"{MEMORY_CONTEXT_PROMPT}\n{body}"))
+
+        if self._search_cache is not None:
+            self._last_context = (
+                query_text,
+                scope,
+                tuple(context_messages),
+                time.monotonic() + self._config.cache_ttl_seconds,
+            )
 
         if not context_messages:
             return Context()
@@ -566,12 +961,12 @@ class Neo4jContextProvider(ContextProvider):
         Raises:
             ValueError: If driver not initialized or memory not enabled.
         """
-        if self._driver is None:
+        if self._async_driver is None:
             raise ValueError("Driver not initialized - cannot create memory indexes")
         if self._memory_manager is None:
             raise ValueError("Memory not enabled - cannot create memory indexes")
 
-        await self._memory_manager.ensure_indexes(self._driver)
+        await self._memory_manager.ensure_indexes(self._async_driver)
 
     @override
     async def invoked(
@@ -594,27 +989,55 @@ class Neo4jContextProvider(ContextProvider):
             **kwargs: Additional keyword arguments (unused).
         """
         # Skip if memory is disabled or not connected
-        if not self._memory_enabled or self._driver is None or self._memory_manager is None:
+        if not self._memory_enabled or self._async_driver is None or self._memory_manager is None:
             return
 
         # Ensure memory indexes exist (lazy initialization - first use creates indexes)
-        await self._memory_manager.ensure_indexes(self._driver)
+        await self._memory_manager.ensure_indexes(self._async_driver)
 
-        # Convert to lists (following Mem0/Redis patterns)
-        request_list = (
-            [request_messages]
-            if isinstance(request_messages, ChatMessage)
-            else list(request_messages)
-        )
-        response_list = (
-            [response_messages]
-            if isinstance(response_messages, ChatMessage)
-            else list(response_messages)
-            if response_messages
-            else []
-        )
+        # Combine request and response messages into one list (following
+        # Mem0/Redis patterns) without intermediate per-side copies
+        all_messages = [request_messages] if isinstance(request_messages, ChatMessage) else list(request_messages)
+        if isinstance(response_messages, ChatMessage):
+            all_messages.append(response_messages)
+        elif response_messages:
+            all_messages.extend(response_messages)
 
-        # Combine all messages and store via MemoryManager
-        all_messages = [*request_list, *response_list]
+        # Store via MemoryManager
         scope = self._get_scope_filter()
-        await self._memory_manager.store(self._driver, all_messages, scope)
+        if not self._background_memory_writes:
+            await self._store_memories(self._async_driver, self._memory_manager, all_messages, scope)
+            return
+
+        # Fire-and-forget: the turn continues while embedding and the write
+        # complete; __aexit__ waits for pending writes before closing
+        task = asyncio.create_task(self._store_memories(self._async_driver, self._memory_manager, all_messages, scope))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._on_write_done)
+
+    async def _store_memories(
+        self,
+        driver: neo4j.AsyncDriver,
+        memory_manager: MemoryManager,
+        messages: list[ChatMessage],
+        scope: ScopeFilter,
+    ) -> None:
+        """Store messages via MemoryManager and invalidate cached results."""
+        await memory_manager.store(driver, messages, scope)
+
+        # The last context includes recalled memories, so it is always stale;
+        # cached search results only when the retrieval index covers memories
+        self._last_context = None
+        if self._search_cache is not None and self._memory_in_retrieval_index:
+            self._search_cache.clear()
+
+    def _on_write_done(self, task: asyncio.Task[None]) -> None:
+        """Forget a finished background write and log its failure, if any."""
+        self._pending_writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background memory write failed", exc_info=task.exception())
+
+    async def _wait_for_pending_writes(self) -> None:
+        """Wait for background memory writes scheduled by invoked()."""
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
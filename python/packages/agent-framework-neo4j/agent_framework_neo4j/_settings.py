@@ -62,7 +62,7 @@ class Neo4jSettings(BaseSettings):
     @property
     def is_configured(self) -> bool:
         """Check if all required Neo4j connection settings are provided."""
-        return all([self.uri, self.username, self.password])
+        return bool(self.uri and self.username and self.password)
 
     def get_password(self) -> str | None:
         """Safely retrieve the password value."""
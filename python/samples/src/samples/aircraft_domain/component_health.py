@@ -19,12 +19,13 @@ from samples.shared import print_header
 # Simplified to minimize context size
 # Note: Uses explicit grouping and null-safe sorting per Cypher best practices
 COMPONENT_RETRIEVAL_QUERY = """
+WITH node, score
+WHERE score IS NOT NULL
 MATCH (node)<-[:HAS_COMPONENT]-(sys:System)<-[:HAS_SYSTEM]-(aircraft:Aircraft)
 OPTIONAL MATCH (node)-[:HAS_EVENT]->(event:MaintenanceEvent)
 WITH node, score, aircraft, sys,
      count(event) AS event_count,
-     collect(event.severity)[0] AS last_severity
-WHERE score IS NOT NULL
+     head(collect(event.severity)) AS last_severity
 RETURN
     node.name AS component,
     node.type AS type,
@@ -16,15 +16,16 @@ from samples.shared import print_header
 # Variables available from vector search:
 #   - node: The Chunk node matched by vector similarity
 #   - score: Similarity score (0.0 to 1.0)
-# Note: Uses explicit grouping and null-safe sorting per Cypher best practices
+# Note: Uses explicit grouping and null-safe sorting per Cypher best practices.
+# Risks and products are aggregated in separate steps so the two OPTIONAL
+# MATCHes don't expand into a risks x products Cartesian product per company.
 RETRIEVAL_QUERY = """
 MATCH (node)-[:FROM_DOCUMENT]->(doc:Document)<-[:FILED]-(company:Company)
+WHERE score IS NOT NULL
 OPTIONAL MATCH (company)-[:FACES_RISK]->(risk:RiskFactor)
+WITH node, score, company, doc, collect(DISTINCT risk.name)[0..5] AS risks
 OPTIONAL MATCH (company)-[:MENTIONS]->(product:Product)
-WITH node, score, company, doc,
-     collect(DISTINCT risk.name)[0..5] AS risks,
-     collect(DISTINCT product.name)[0..5] AS products
-WHERE score IS NOT NULL
+WITH node, score, company, doc, risks, collect(DISTINCT product.name)[0..5] AS products
 RETURN
     node.text AS text,
     score,
@@ -3,10 +3,16 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import os
+from pathlib import Path
 
+# samples/ project root (shared -> samples -> src -> samples/)
+_PROJECT_ROOT = Path(__file__).resolve().parents[3]
 
+
+@functools.lru_cache(maxsize=1)
 def get_env_file_path() -> str | None:
     """
     Get the path to the environment file to load.
@@ -16,6 +22,8 @@ def get_env_file_path() -> str | None:
     2. Checks for .env in project root (one level up from samples/)
     3. Checks .azure/config.json to find the azd-managed .env
 
+    The result is cached for the life of the process.
+
     Returns:
         Absolute path to the environment file, or None.
     """
@@ -23,11 +31,7 @@ def get_env_file_path() -> str | None:
     if os.getenv("RUNNING_IN_PRODUCTION"):
         return None
 
-    # Get samples root (four levels up from shared/: shared -> samples -> src -> samples/)
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    samples_pkg_dir = os.path.dirname(current_dir)  # samples/src/samples
-    src_dir = os.path.dirname(samples_pkg_dir)       # samples/src
-    project_root = os.path.dirname(src_dir)          # samples/
+    project_root = str(_PROJECT_ROOT)
 
     # Check for .env in project root
     root_env = os.path.join(project_root, '.env')
@@ -4,11 +4,142 @@ Tests for Neo4j Context Provider.
 Tests the provider initialization and configuration validation.
 """
 
+import asyncio
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import neo4j
 import pytest
 from agent_framework import ChatMessage, Role
+from neo4j_graphrag.embeddings import Embedder
+from neo4j_graphrag.types import RetrieverResult, RetrieverResultItem
 
 from agent_framework_neo4j import Neo4jContextProvider, Neo4jSettings
-from agent_framework_neo4j._memory import MemoryManager, ScopeFilter
+from agent_framework_neo4j._cache import CachedEmbedder, QueryCache, get_cached_embedder
+from agent_framework_neo4j._memory import MemoryManager, MemoryRecord, ScopeFilter
+from agent_framework_neo4j._provider import _format_cypher_result
+
+
+class FakeEmbedder(Embedder):
+    """Deterministic embedder that records the texts it embeds."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: list[str] = []
+
+    def embed_query(self, text: str) -> list[float]:
+        self.calls.append(text)
+        return [float(len(text)), 1.0, 0.0]
+
+
+class FakeBatchEmbedder(FakeEmbedder):
+    """FakeEmbedder that also supports batched embedding."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.batches: list[list[str]] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return [[float(len(text)), 0.0, 1.0] for text in texts]
+
+
+class FakeAsyncResult:
+    """Minimal stand-in for neo4j.AsyncResult."""
+
+    def __init__(self, records: list[dict[str, Any]]) -> None:
+        self._records = records
+
+    def __aiter__(self) -> AsyncIterator[neo4j.Record]:
+        async def _iterate() -> AsyncIterator[neo4j.Record]:
+            for record in self._records:
+                yield neo4j.Record(record)
+
+        return _iterate()
+
+    async def consume(self) -> None:
+        return None
+
+
+class FakeAsyncSession:
+    """Minimal stand-in for neo4j.AsyncSession that records queries."""
+
+    def __init__(self, driver: "FakeAsyncDriver") -> None:
+        self._driver = driver
+
+    async def __aenter__(self) -> "FakeAsyncSession":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        return None
+
+    async def run(self, query: str, parameters: dict[str, Any] | None = None, **kwargs: Any) -> FakeAsyncResult:
+        self._driver.queries.append((query, {**(parameters or {}), **kwargs}))
+        return FakeAsyncResult(self._driver.records)
+
+    async def execute_write(self, work: Any, *args: Any, **kwargs: Any) -> Any:
+        self._driver.transactions += 1
+        return await work(self, *args, **kwargs)
+
+
+class FakeAsyncDriver:
+    """Minimal stand-in for neo4j.AsyncDriver that records queries."""
+
+    def __init__(self, records: list[dict[str, Any]] | None = None, agent: str = "Neo4j/5.26.0") -> None:
+        self.records = records or []
+        self.queries: list[tuple[str, dict[str, Any]]] = []
+        self.transactions = 0
+        self.read_transactions = 0
+        self.agent = agent
+
+    def session(self, **_kwargs: Any) -> FakeAsyncSession:
+        return FakeAsyncSession(self)
+
+    async def get_server_info(self) -> Any:
+        return type("ServerInfo", (), {"agent": self.agent})()
+
+    async def execute_query(
+        self,
+        query: str,
+        parameters: dict[str, Any] | None = None,
+        routing_: neo4j.RoutingControl = neo4j.RoutingControl.WRITE,
+        result_transformer_: Any = None,
+        **_kwargs: Any,
+    ) -> Any:
+        if routing_ == neo4j.RoutingControl.READ:
+            self.read_transactions += 1
+        self.queries.append((query, dict(parameters or {})))
+        return await result_transformer_(FakeAsyncResult(self.records))
+
+
+class FakeRetriever:
+    """Stand-in for a neo4j-graphrag retriever that records search calls."""
+
+    def __init__(self) -> None:
+        self.calls: list[dict[str, Any]] = []
+
+    def search(self, **kwargs: Any) -> RetrieverResult:
+        self.calls.append(kwargs)
+        return RetrieverResult(items=[RetrieverResultItem(content=f"result {len(self.calls)}")])
+
+
+def connect_fakes(
+    provider: Neo4jContextProvider,
+    retriever: FakeRetriever | None = None,
+    async_driver: FakeAsyncDriver | None = None,
+) -> FakeRetriever:
+    """Wire a provider to fakes the way __aenter__ wires real connections."""
+    retriever = retriever or FakeRetriever()
+    provider._driver = object()  # type: ignore[assignment]
+    provider._retriever = retriever  # type: ignore[assignment]
+    provider._search = provider._make_search()
+    if async_driver is not None:
+        provider._async_driver = async_driver  # type: ignore[assignment]
+    return retriever
 
 
 class TestSettings:
@@ -48,6 +179,22 @@ class TestProviderInit:
                 index_type="fulltext",
             )
 
+    def test_explicit_connection_skips_env_settings(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Settings should not be loaded when every value is passed explicitly."""
+
+        def fail() -> None:
+            raise AssertionError("Neo4jSettings should not be constructed")
+
+        monkeypatch.setattr("agent_framework_neo4j._provider.Neo4jSettings", fail)
+        provider = Neo4jContextProvider(
+            uri="bolt://localhost:7687",
+            username="neo4j",
+            password="secret",
+            index_name="test_index",
+            index_type="fulltext",
+        )
+        assert provider._config.get_connection() == ("bolt://localhost:7687", "neo4j", "secret")
+
     def test_requires_embedder_for_vector_type(self) -> None:
         """Provider should require embedder when index_type is vector."""
         with pytest.raises(ValueError, match="embedder is required"):
@@ -94,6 +241,43 @@ class TestProviderInit:
         )
         assert not provider.is_connected
 
+    @pytest.mark.asyncio
+    async def test_nested_enter_reuses_connection(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Re-entering should not reconnect, and only the outermost exit closes."""
+        drivers: list[Any] = []
+
+        class FakeDriver:
+            closed = False
+
+            def verify_connectivity(self) -> None:
+                pass
+
+            def close(self) -> None:
+                self.closed = True
+
+        def make_driver(*_args: Any, **_kwargs: Any) -> FakeDriver:
+            drivers.append(FakeDriver())
+            return drivers[-1]
+
+        monkeypatch.setattr(neo4j.GraphDatabase, "driver", make_driver)
+        provider = Neo4jContextProvider(
+            uri="bolt://localhost:7687",
+            username="neo4j",
+            password="password",
+            index_name="test_index",
+            index_type="fulltext",
+        )
+        monkeypatch.setattr(provider, "_create_retriever", FakeRetriever)
+
+        async with provider:
+            async with provider:
+                assert provider.is_connected
+            assert provider.is_connected
+            assert not drivers[0].closed
+        assert not provider.is_connected
+        assert len(drivers) == 1
+        assert drivers[0].closed
+
     def test_custom_context_prompt(self) -> None:
         """Provider should accept custom context prompt."""
         custom_prompt = "Custom prompt for testing"
@@ -113,6 +297,127 @@ class TestProviderInit:
         )
         assert provider._message_history_count == 5
 
+    def test_connection_pool_options(self) -> None:
+        """Provider should forward pool tuning options to the driver."""
+        provider = Neo4jContextProvider(
+            index_name="test_index",
+            index_type="fulltext",
+            max_connection_pool_size=10,
+            connection_acquisition_timeout=5.0,
+            max_connection_lifetime=300.0,
+            keep_alive=False,
+        )
+        options = provider._config.get_driver_options()
+        assert options["max_connection_pool_size"] == 10
+        assert options["connection_acquisition_timeout"] == 5.0
+        assert options["connection_timeout"] == 30.0
+        assert options["max_connection_lifetime"] == 300.0
+        assert options["keep_alive"] is False
+
+    def test_connection_pool_size_matches_driver_default(self) -> None:
+        """The default pool size should match the neo4j driver's own default."""
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext")
+        assert provider._config.get_driver_options()["max_connection_pool_size"] == 100
+
+    @pytest.mark.parametrize(("pool_size", "retrieval", "memory"), [(100, 75, 25), (4, 3, 1), (1, 1, 1)])
+    def test_split_driver_options_share_the_pool(self, pool_size: int, retrieval: int, memory: int) -> None:
+        """Retrieval and memory drivers should split the configured pool size."""
+        provider = Neo4jContextProvider(
+            index_name="test_index",
+            index_type="fulltext",
+            max_connection_pool_size=pool_size,
+        )
+        retrieval_options, memory_options = provider._config.get_split_driver_options()
+        assert retrieval_options["max_connection_pool_size"] == retrieval
+        assert memory_options["max_connection_pool_size"] == memory
+        assert memory_options["connection_timeout"] == retrieval_options["connection_timeout"]
+
+    def test_connection_pool_size_validation(self) -> None:
+        """Provider should reject a non-positive pool size."""
+        with pytest.raises(ValueError, match="max_connection_pool_size must be at least 1"):
+            Neo4jContextProvider(
+                index_name="test_index",
+                index_type="fulltext",
+                max_connection_pool_size=0,
+            )
+
+    def test_max_concurrent_searches_from_env(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """max_concurrent_searches should fall back to NEO4J_MAX_CONCURRENT_SEARCHES."""
+        monkeypatch.setenv("NEO4J_MAX_CONCURRENT_SEARCHES", "64")
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext")
+        assert provider._config.max_concurrent_searches == 64
+        assert provider._search_executor._max_workers == 64
+
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext", max_concurrent_searches=8)
+        assert provider._config.max_concurrent_searches == 8
+
+        # Read without loading every setting when the connection is explicit
+        def fail() -> None:
+            raise AssertionError("Neo4jSettings should not be constructed")
+
+        monkeypatch.setattr("agent_framework_neo4j._provider.Neo4jSettings", fail)
+        provider = Neo4jContextProvider(
+            uri="bolt://localhost:7687",
+            username="neo4j",
+            password="secret",
+            index_name="test_index",
+            index_type="fulltext",
+        )
+        assert provider._config.max_concurrent_searches == 64
+
+    def test_providers_share_thread_pools(self) -> None:
+        """Providers with the same pool sizes should reuse one set of threads."""
+        first = Neo4jContextProvider(index_name="test_index", index_type="fulltext")
+        second = Neo4jContextProvider(index_name="test_index", index_type="fulltext")
+        other = Neo4jContextProvider(index_name="test_index", index_type="fulltext", max_concurrent_searches=2)
+        assert second._search_executor is first._search_executor
+        assert second._embed_executor is first._embed_executor
+        assert other._search_executor is not first._search_executor
+
+    def test_max_concurrent_searches_env_must_be_integer(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """A non-numeric NEO4J_MAX_CONCURRENT_SEARCHES should name the variable."""
+        monkeypatch.setenv("NEO4J_MAX_CONCURRENT_SEARCHES", "many")
+        with pytest.raises(ValueError, match="NEO4J_MAX_CONCURRENT_SEARCHES must be an integer"):
+            Neo4jContextProvider(index_name="test_index", index_type="fulltext")
+
+    def test_max_concurrent_embeddings_validation(self) -> None:
+        """Provider should require at least one concurrent embedding slot."""
+        with pytest.raises(ValueError, match="max_concurrent_embeddings must be at least 1"):
+            Neo4jContextProvider(
+                index_name="test_index",
+                index_type="fulltext",
+                max_concurrent_embeddings=0,
+            )
+
+    def test_index_type_validation(self) -> None:
+        """Provider should reject unknown index types."""
+        with pytest.raises(ValueError, match="Invalid index_type"):
+            Neo4jContextProvider(
+                index_name="test_index",
+                index_type="graph",  # type: ignore[arg-type]
+            )
+
+    @pytest.mark.parametrize(
+        ("option", "value", "message"),
+        [
+            ("top_k", "5", "top_k must be an integer"),
+            ("cache_max_size", 8.0, "cache_max_size must be an integer"),
+            ("max_connection_pool_size", True, "max_connection_pool_size must be an integer"),
+            ("memory_embedding_dimensions", "3", "memory_embedding_dimensions must be an integer"),
+            ("cache_ttl_seconds", "60", "cache_ttl_seconds must be a number"),
+        ],
+    )
+    def test_numeric_option_types_are_checked(self, option: str, value: Any, message: str) -> None:
+        """Numeric options of the wrong type should be rejected, not compared."""
+        with pytest.raises(ValueError, match=message):
+            Neo4jContextProvider(index_name="test_index", index_type="fulltext", **{option: value})
+
+    def test_config_is_immutable(self) -> None:
+        """Validated configuration should be frozen."""
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext")
+        with pytest.raises(AttributeError):
+            provider._config.top_k = 10  # type: ignore[misc]
+
     def test_top_k_validation(self) -> None:
         """Provider should validate top_k is positive."""
         with pytest.raises(ValueError, match="top_k must be at least 1"):
@@ -159,6 +464,63 @@ class TestGraphEnrichment:
         assert "collect(DISTINCT risk.name)" in provider._retrieval_query
 
 
+class TestFormatCypherResult:
+    """Test formatting of retrieval query records."""
+
+    def test_text_becomes_content(self) -> None:
+        """'text' column should become content; other columns metadata."""
+        record = neo4j.Record({"text": "chunk", "score": 0.9, "company": "ACME"})
+        item = _format_cypher_result(record)
+        assert item.content == "chunk"
+        assert item.metadata == {"score": 0.9, "company": "ACME"}
+
+    def test_falls_back_to_first_string(self) -> None:
+        """Without 'text', the first string column should be used as content."""
+        record = neo4j.Record({"score": 0.5, "fault": "vibration", "severity": "HIGH"})
+        item = _format_cypher_result(record)
+        assert item.content == "vibration"
+        assert item.metadata == {"score": 0.5, "fault": "vibration", "severity": "HIGH"}
+
+    def test_text_only_has_no_metadata(self) -> None:
+        """A record with only 'text' should have no metadata."""
+        item = _format_cypher_result(neo4j.Record({"text": "chunk"}))
+        assert item.content == "chunk"
+        assert item.metadata is None
+
+
+class TestFormatRetrieverResult:
+    """Test formatting of retriever results into context text."""
+
+    def test_format_field_scalars_and_collections(self) -> None:
+        """Strings and scalars are kept whole; collections are joined."""
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext")
+        assert provider._format_field("company", "Acme") == "[company: Acme]"
+        assert provider._format_field("count", 3) == "[count: 3]"
+        assert provider._format_field("risks", ["fire", "flood"]) == "[risks: fire, flood]"
+        assert provider._format_field("risks", []) == ""
+
+    def test_format_retriever_result(self) -> None:
+        """Score, metadata and content should be combined on one line."""
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext")
+        result = RetrieverResult(
+            items=[
+                RetrieverResultItem(
+                    content="Engine report",
+                    metadata={
+                        "score": 0.5,
+                        "company": "Acme",
+                        "tags": [],
+                        "risks": ("fire",),
+                        "missing": None,
+                    },
+                )
+            ]
+        )
+        assert provider._format_retriever_result(result) == [
+            "[Score: 0.500] [company: Acme] [risks: fire] Engine report"
+        ]
+
+
 class TestInvoking:
     """Test the invoking method."""
 
@@ -182,6 +544,153 @@ class TestInvoking:
         context = await provider.invoking(messages)
         assert context.messages == []
 
+    @pytest.mark.asyncio
+    async def test_invoking_queries_recent_user_and_assistant_text(self) -> None:
+        """The query should join the last message_history_count qualifying texts."""
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext", message_history_count=2)
+        retriever = connect_fakes(provider)
+
+        messages = [
+            ChatMessage(role=Role.USER, text="oldest question"),
+            ChatMessage(role=Role.ASSISTANT, text="answer"),
+            ChatMessage(role=Role.SYSTEM, text="system note"),
+            ChatMessage(role=Role.USER, text="  "),
+            ChatMessage(role=Role.USER, text="latest question"),
+        ]
+        context = await provider.invoking(messages)
+
+        assert retriever.calls[0]["query_text"] == "answer\nlatest question"
+        assert [m.text for m in context.messages] == [f"{provider._context_prompt}\n\nresult 1"]
+
+    @pytest.mark.asyncio
+    async def test_invoking_reuses_context_for_repeated_query(self) -> None:
+        """With the cache enabled, an identical follow-up query should reuse the previous context."""
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext", cache_max_size=8)
+        retriever = connect_fakes(provider)
+
+        first = await provider.invoking(ChatMessage(role=Role.USER, text="engine status"))
+        second = await provider.invoking(ChatMessage(role=Role.USER, text="engine status"))
+        await provider.invoking(ChatMessage(role=Role.USER, text="wing status"))
+
+        assert [m.text for m in second.messages] == [m.text for m in first.messages]
+        assert second.messages is not first.messages
+        assert len(retriever.calls) == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(("cache_max_size", "ttl"), [(0, 300.0), (8, 0.01)])
+    async def test_invoking_searches_again_without_live_cache(self, cache_max_size: int, ttl: float) -> None:
+        """Repeated queries should search again when the cache is disabled or expired."""
+        provider = Neo4jContextProvider(
+            index_name="test_index",
+            index_type="fulltext",
+            cache_max_size=cache_max_size,
+            cache_ttl_seconds=ttl,
+        )
+        retriever = connect_fakes(provider)
+
+        await provider.invoking(ChatMessage(role=Role.USER, text="engine status"))
+        await asyncio.sleep(0.02)
+        second = await provider.invoking(ChatMessage(role=Role.USER, text="engine status"))
+
+        assert len(retriever.calls) == 2
+        assert [m.text for m in second.messages] == [f"{provider._context_prompt}\n\nresult 2"]
+
+    @pytest.mark.asyncio
+    async def test_invoking_skips_short_queries(self) -> None:
+        """Queries with fewer than min_query_words words should not search."""
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext", min_query_words=3)
+        retriever = connect_fakes(provider)
+
+        context = await provider.invoking(ChatMessage(role=Role.USER, text="ok thanks"))
+        assert context.messages == []
+        assert retriever.calls == []
+
+        await provider.invoking(ChatMessage(role=Role.USER, text="check engine status"))
+        assert len(retriever.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_invoking_combines_graph_and_memory_results(self) -> None:
+        """Graph results and memories should each form one message, graph first."""
+        provider = Neo4jContextProvider(
+            index_name="test_index",
+            index_type="fulltext",
+            memory_enabled=True,
+            user_id="test_user",
+        )
+        record = {"text": "earlier", "role": "user", "timestamp": None, "score": 1.0}
+        connect_fakes(provider, async_driver=FakeAsyncDriver(records=[record]))
+
+        context = await provider.invoking(ChatMessage(role=Role.USER, text="question"))
+
+        graph, memory = (m.text for m in context.messages)
+        assert graph == f"{provider._context_prompt}\n\nresult 1"
+        assert memory.startswith("## Conversation Memory")
+        assert memory.endswith("\n[user]: earlier")
+
+    @pytest.mark.asyncio
+    async def test_invoking_embeds_query_once_for_both_searches(self) -> None:
+        """Vector search and memory search should share one query embedding."""
+        embedder = FakeEmbedder()
+        provider = Neo4jContextProvider(
+            index_name="test_index",
+            index_type="vector",
+            embedder=embedder,
+            embedding_cache_size=0,
+            memory_enabled=True,
+            memory_embedding_dimensions=3,
+            user_id="test_user",
+        )
+        driver = FakeAsyncDriver()
+        retriever = connect_fakes(provider, async_driver=driver)
+
+        await provider.invoking(ChatMessage(role=Role.USER, text="question"))
+
+        assert embedder.calls == ["question"]
+        assert retriever.calls[0]["query_vector"] == [8.0, 1.0, 0.0]
+        _, params = driver.queries[0]
+        assert params["query_embedding"] == [8.0, 1.0, 0.0]
+
+
+class TestExecuteSearch:
+    """Test the search callable built on connect."""
+
+    @pytest.mark.asyncio
+    async def test_execute_search_requires_connection(self) -> None:
+        """Searching before connect should raise."""
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext")
+        with pytest.raises(ValueError, match="Retriever not initialized"):
+            await provider._execute_search("query")
+
+    @pytest.mark.asyncio
+    async def test_uncached_search_passes_text_and_top_k(self) -> None:
+        """Without a cache, every search should reach the retriever."""
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext", top_k=7)
+        retriever = connect_fakes(provider)
+
+        await provider._execute_search("engine status")
+        await provider._execute_search("engine status")
+        assert retriever.calls == [{"query_text": "engine status", "top_k": 7}] * 2
+
+    @pytest.mark.asyncio
+    async def test_cached_vector_search_embeds_once_per_query(self) -> None:
+        """Cached vector search should pass the precomputed vector and reuse hits."""
+        embedder = FakeEmbedder()
+        provider = Neo4jContextProvider(
+            index_name="test_index",
+            index_type="vector",
+            embedder=embedder,
+            cache_max_size=8,
+        )
+        retriever = connect_fakes(provider)
+
+        first = await provider._execute_search("engine status")
+        second = await provider._execute_search("engine status")
+        assert first is second
+        assert embedder.calls == ["engine status"]
+        assert len(retriever.calls) == 1
+        assert "query_text" not in retriever.calls[0]
+        assert retriever.calls[0]["query_vector"] == [13.0, 1.0, 0.0]
+
 
 class TestHybridMode:
     """Test hybrid search mode."""
@@ -344,6 +853,28 @@ class TestThreadIdHandling:
         with pytest.raises(ValueError, match="can only be used with one thread"):
             await provider.thread_created("different_thread")
 
+    @pytest.mark.asyncio
+    async def test_scope_filter_reused_until_scope_changes(self) -> None:
+        """The scope filter should be rebuilt only when a scope field changes."""
+        provider = Neo4jContextProvider(
+            index_name="test_index",
+            index_type="fulltext",
+            memory_enabled=True,
+            user_id="test_user",
+            scope_to_per_operation_thread_id=True,
+        )
+        first = provider._get_scope_filter()
+        assert provider._get_scope_filter() is first
+        assert first.thread_id is None
+
+        await provider.thread_created("thread_1")
+        scoped = provider._get_scope_filter()
+        assert scoped is not first
+        assert scoped.thread_id == "thread_1"
+
+        provider.user_id = "other_user"
+        assert provider._get_scope_filter().user_id == "other_user"
+
 
 class TestInvoked:
     """Test the invoked method for memory storage."""
@@ -372,6 +903,116 @@ class TestInvoked:
         # Should not raise any errors (not connected, so no storage attempt)
         await provider.invoked(message)
 
+    @pytest.mark.asyncio
+    async def test_invoked_stores_request_and_response(self) -> None:
+        """Request and response messages should be stored together."""
+        provider = Neo4jContextProvider(
+            index_name="test_index",
+            index_type="fulltext",
+            memory_enabled=True,
+            user_id="test_user",
+        )
+        driver = FakeAsyncDriver()
+        provider._async_driver = driver  # type: ignore[assignment]
+
+        await provider.invoked(
+            [ChatMessage(role=Role.USER, text="question")],
+            ChatMessage(role=Role.ASSISTANT, text="answer"),
+        )
+
+        store_query, params = driver.queries[-1]
+        assert "UNWIND $memories" in store_query
+        assert [row["text"] for row in params["memories"]] == ["question", "answer"]
+
+    @pytest.mark.asyncio
+    async def test_background_writes_finish_before_exit(self) -> None:
+        """Background stores should complete by the time the provider closes."""
+        provider = Neo4jContextProvider(
+            index_name="test_index",
+            index_type="fulltext",
+            memory_enabled=True,
+            user_id="test_user",
+            background_memory_writes=True,
+        )
+        driver = FakeAsyncDriver()
+        provider._async_driver = driver  # type: ignore[assignment]
+
+        await provider.invoked(ChatMessage(role=Role.USER, text="remember this"))
+        assert len(provider._pending_writes) == 1
+
+        await provider._wait_for_pending_writes()
+        assert not provider._pending_writes
+        _, params = driver.queries[-1]
+        assert params["memories"][0]["text"] == "remember this"
+
+    @pytest.mark.asyncio
+    async def test_background_write_failure_is_logged(self, caplog: pytest.LogCaptureFixture) -> None:
+        """A failed background store should be logged, not raised into the turn."""
+        provider = Neo4jContextProvider(
+            index_name="test_index",
+            index_type="fulltext",
+            memory_enabled=True,
+            user_id="test_user",
+            background_memory_writes=True,
+        )
+        provider._async_driver = FakeAsyncDriver()  # type: ignore[assignment]
+
+        async def failing_store(*_args: Any) -> None:
+            raise RuntimeError("write failed")
+
+        provider._memory_manager.store = failing_store  # type: ignore[method-assign,union-attr]
+        await provider.invoked(ChatMessage(role=Role.USER, text="remember this"))
+        await provider._wait_for_pending_writes()
+        await asyncio.sleep(0)
+
+        assert "Background memory write failed" in caplog.text
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("memory_in_index", [False, True])
+    async def test_memory_writes_only_clear_search_cache_when_indexed(self, memory_in_index: bool) -> None:
+        """Stored memories should only drop cached search results the index could change."""
+        provider = Neo4jContextProvider(
+            index_name="test_index",
+            index_type="fulltext",
+            memory_enabled=True,
+            user_id="test_user",
+            cache_max_size=8,
+        )
+        provider._async_driver = FakeAsyncDriver()  # type: ignore[assignment]
+        provider._memory_in_retrieval_index = memory_in_index
+        assert provider._search_cache is not None
+        provider._search_cache.put(("test_index", 5, "question"), RetrieverResult(items=[]))
+        provider._last_context = ("question", None, (), time.monotonic() + 60)
+
+        await provider.invoked(ChatMessage(role=Role.USER, text="remember this"))
+
+        assert provider._last_context is None
+        assert len(provider._search_cache) == (0 if memory_in_index else 1)
+
+    @pytest.mark.parametrize(
+        ("labels", "expected"),
+        [([["Chunk"]], False), ([["Chunk", "Memory"]], True), ([], False), (None, True)],
+    )
+    def test_retrieval_index_memory_check(self, labels: list[list[str]] | None, expected: bool) -> None:
+        """The index label lookup should decide whether memories reach search results."""
+
+        class FakeDriver:
+            def execute_query(self, query: str, parameters: dict[str, Any], **_kwargs: Any) -> Any:
+                assert query.startswith("SHOW INDEXES")
+                assert parameters == {"names": ["test_index"]}
+                if labels is None:
+                    raise neo4j.exceptions.ClientError("permission denied")
+                return [neo4j.Record({"labelsOrTypes": row}) for row in labels], None, None
+
+        provider = Neo4jContextProvider(
+            index_name="test_index",
+            index_type="fulltext",
+            memory_enabled=True,
+            user_id="test_user",
+        )
+        provider._driver = FakeDriver()  # type: ignore[assignment]
+        assert provider._retrieval_indexes_memory() is expected
+
 
 class TestMemoryIndexConfiguration:
     """Test memory index configuration (Phase 1B lazy initialization)."""
@@ -485,6 +1126,31 @@ class TestScopeFilter:
         where_clause, params = scope.to_cypher_where(alias="memory")
         assert "memory.user_id = $user_id" in where_clause
 
+    def test_has_any_scope(self) -> None:
+        """has_any_scope should reflect whether any field is set."""
+        assert ScopeFilter().has_any_scope is False
+        assert ScopeFilter(thread_id="t1").has_any_scope is True
+        assert ScopeFilter(application_id="a", user_id="u")._mask == 0b0101
+
+    def test_params_are_copied_per_call(self) -> None:
+        """Callers extending the params dict should not affect the filter."""
+        scope = ScopeFilter(user_id="u1")
+        _, params = scope.to_cypher_where()
+        params["top_k"] = 5
+        _, fresh = scope.to_cypher_where()
+        assert fresh == {"user_id": "u1"}
+
+    def test_where_clause_matches_field_order(self) -> None:
+        """Pre-built clauses should list fields in a stable order."""
+        scope = ScopeFilter(user_id="u1", application_id="app1")
+        where_clause, params = scope.to_cypher_where()
+        assert where_clause == "m.application_id = $application_id AND m.user_id = $user_id"
+        assert params == {"application_id": "app1", "user_id": "u1"}
+
+    def test_equality_ignores_mask(self) -> None:
+        """Scope filters with the same fields should compare equal."""
+        assert ScopeFilter(user_id="u1") == ScopeFilter(user_id="u1")
+
     def test_immutable(self) -> None:
         """ScopeFilter should be immutable (frozen dataclass)."""
         scope = ScopeFilter(user_id="test_user")
@@ -528,3 +1194,621 @@ class TestMemoryManager:
         assert manager.indexes_initialized is False
         manager._indexes_initialized = True
         assert manager.indexes_initialized is True
+
+    @pytest.mark.asyncio
+    async def test_embed_texts_preserves_order(self) -> None:
+        """Batch embedding should return one vector per text, in order."""
+        embedder = FakeEmbedder()
+        manager = MemoryManager(memory_roles={"user"}, embedder=embedder)
+        embeddings = await manager._embed_texts(["a", "bbb", "cc"])
+        assert embeddings == [[1.0, 1.0, 0.0], [3.0, 1.0, 0.0], [2.0, 1.0, 0.0]]
+        assert sorted(embedder.calls) == ["a", "bbb", "cc"]
+
+    @pytest.mark.asyncio
+    async def test_embed_texts_fans_out_without_batch_method(self) -> None:
+        """Embedders without embed_documents should embed texts concurrently."""
+
+        class BarrierEmbedder(FakeEmbedder):
+            def __init__(self) -> None:
+                super().__init__()
+                self.barrier = threading.Barrier(2, timeout=5)
+
+            def embed_query(self, text: str) -> list[float]:
+                # Both calls must be in flight at once to pass the barrier
+                self.barrier.wait()
+                return super().embed_query(text)
+
+        manager = MemoryManager(
+            memory_roles={"user"},
+            embedder=get_cached_embedder(BarrierEmbedder()),
+            embed_executor=ThreadPoolExecutor(max_workers=2),
+        )
+        embeddings = await manager._embed_texts(["a", "bb"])
+        assert embeddings == [[1.0, 1.0, 0.0], [2.0, 1.0, 0.0]]
+
+    @pytest.mark.asyncio
+    async def test_embed_texts_uses_batch_method(self) -> None:
+        """Embedders with embed_documents should be called once per batch."""
+        embedder = FakeBatchEmbedder()
+        manager = MemoryManager(memory_roles={"user"}, embedder=embedder)
+        embeddings = await manager._embed_texts(["a", "bb"])
+        assert embeddings == [[1.0, 0.0, 1.0], [2.0, 0.0, 1.0]]
+        assert embedder.batches == [["a", "bb"]]
+        assert embedder.calls == []
+
+    @pytest.mark.asyncio
+    async def test_embed_texts_batches_by_length(self) -> None:
+        """Batched texts should be grouped by length and returned in input order."""
+        embedder = FakeBatchEmbedder()
+        manager = MemoryManager(memory_roles={"user"}, embedder=embedder)
+        texts = ["x" * n for n in (5, 40, 1, 33, 2)] + [f"y{i:02d}" for i in range(30)]
+        embeddings = await manager._embed_texts(texts)
+        assert embeddings == [[float(len(text)), 0.0, 1.0] for text in texts]
+        assert sorted(len(batch) for batch in embedder.batches) == [3, 32]
+        longest = next(batch for batch in embedder.batches if len(batch) == 3)
+        assert [len(text) for text in longest] == [5, 33, 40]
+
+    @pytest.mark.asyncio
+    async def test_embed_texts_embeds_duplicates_once(self) -> None:
+        """Repeated texts in a batch should be sent to the embedder once."""
+        embedder = FakeBatchEmbedder()
+        manager = MemoryManager(memory_roles={"user"}, embedder=embedder)
+        embeddings = await manager._embed_texts(["a", "bb", "a"])
+        assert embeddings == [[1.0, 0.0, 1.0], [2.0, 0.0, 1.0], [1.0, 0.0, 1.0]]
+        assert embedder.batches == [["a", "bb"]]
+
+    @pytest.mark.asyncio
+    async def test_embed_texts_rejects_misaligned_batch(self) -> None:
+        """A batch embedder returning the wrong number of vectors should fail loudly."""
+
+        class ShortBatchEmbedder(FakeBatchEmbedder):
+            def embed_documents(self, texts: list[str]) -> list[list[float]]:
+                return super().embed_documents(texts)[:1]
+
+        manager = MemoryManager(memory_roles={"user"}, embedder=ShortBatchEmbedder())
+        with pytest.raises(ValueError, match="returned 1 embeddings for 2 texts"):
+            await manager._embed_texts(["a", "bb"])
+
+    @pytest.mark.asyncio
+    async def test_embedding_calls_respect_executor_size(self) -> None:
+        """Concurrent embedding calls should not exceed the executor's workers."""
+
+        class SlowEmbedder(FakeEmbedder):
+            def __init__(self) -> None:
+                super().__init__()
+                self.active = 0
+                self.peak = 0
+                self.lock = threading.Lock()
+
+            def embed_query(self, text: str) -> list[float]:
+                with self.lock:
+                    self.active += 1
+                    self.peak = max(self.peak, self.active)
+                time.sleep(0.01)
+                with self.lock:
+                    self.active -= 1
+                return super().embed_query(text)
+
+        embedder = SlowEmbedder()
+        manager = MemoryManager(
+            memory_roles={"user"},
+            embedder=embedder,
+            embed_executor=ThreadPoolExecutor(max_workers=1),
+        )
+        await asyncio.gather(*(manager._embed_texts([f"text {i}"]) for i in range(4)))
+        assert embedder.peak == 1
+
+    @pytest.mark.asyncio
+    async def test_ensure_indexes_creates_scope_indexes(self) -> None:
+        """Index creation should include per-field and composite scope indexes."""
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(memory_roles={"user"})
+        await manager.ensure_indexes(driver)  # type: ignore[arg-type]
+
+        statements = [" ".join(query.split()) for query, _ in driver.queries]
+        assert any("CREATE FULLTEXT INDEX memory_fulltext" in s for s in statements)
+        assert any("CREATE INDEX memory_user_id" in s for s in statements)
+        assert any("ON (m.application_id, m.thread_id, m.user_id)" in s for s in statements)
+        assert any("ON (m.user_id, m.timestamp)" in s for s in statements)
+        assert driver.transactions == 1
+        assert manager.indexes_initialized is True
+
+        # Second call is a no-op once initialized
+        await manager.ensure_indexes(driver)  # type: ignore[arg-type]
+        assert len(driver.queries) == len(statements)
+
+    @pytest.mark.asyncio
+    async def test_vector_index_created_from_first_store(self) -> None:
+        """The vector index should take its dimensions from the first stored embedding."""
+        embedder = FakeEmbedder()
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(memory_roles={"user"}, embedder=embedder, overwrite_memory_index=True)
+        await manager.ensure_indexes(driver)  # type: ignore[arg-type]
+        assert embedder.calls == []
+        assert not any("VECTOR INDEX" in q for q, _ in driver.queries)
+
+        await manager.store(driver, [ChatMessage(role=Role.USER, text="hello")], ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+        await manager.store(driver, [ChatMessage(role=Role.USER, text="again")], ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+        await manager.ensure_indexes(driver)  # type: ignore[arg-type]
+
+        assert embedder.calls == ["hello", "again"]
+        vector_ddl = [q for q, _ in driver.queries if "CREATE VECTOR INDEX" in q]
+        assert len(vector_ddl) == 2
+        assert all("`vector.dimensions`: 3" in q for q in vector_ddl)
+
+    @pytest.mark.asyncio
+    async def test_vector_index_created_from_first_search(self) -> None:
+        """A search before any store should create the vector index from the query embedding."""
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(memory_roles={"user"}, embedder=FakeEmbedder())
+        await manager.search(driver, "hello", ScopeFilter(user_id="u1"), top_k=3)  # type: ignore[arg-type]
+
+        ddl, search = (query for query, _ in driver.queries)
+        assert "`vector.dimensions`: 3" in ddl
+        assert "queryNodes" in search
+
+    @pytest.mark.asyncio
+    async def test_configured_dimensions_create_vector_index_up_front(self) -> None:
+        """With embedding_dimensions set, ensure_indexes should create the vector index without embedding."""
+        embedder = FakeEmbedder()
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(memory_roles={"user"}, embedder=embedder, embedding_dimensions=1536)
+        await manager.ensure_indexes(driver)  # type: ignore[arg-type]
+        await manager.search(driver, "hello", ScopeFilter(user_id="u1"), top_k=3)  # type: ignore[arg-type]
+
+        vector_ddl = [q for q, _ in driver.queries if "CREATE VECTOR INDEX" in q]
+        assert len(vector_ddl) == 1
+        assert "`vector.dimensions`: 1536" in vector_ddl[0]
+        assert embedder.calls == ["hello"]
+
+    @pytest.mark.asyncio
+    async def test_store_writes_single_batch(self) -> None:
+        """Store should write all qualifying messages in one query."""
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(memory_roles={"user", "assistant"}, embedder=FakeEmbedder(), embedding_dimensions=3)
+        messages = [
+            ChatMessage(role=Role.USER, text="What is the engine status?"),
+            ChatMessage(role=Role.SYSTEM, text="system prompt"),
+            ChatMessage(role=Role.ASSISTANT, text="The engine is healthy."),
+            ChatMessage(role=Role.USER, text="   "),
+        ]
+        await manager.store(driver, messages, ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+
+        assert len(driver.queries) == 1
+        assert driver.transactions == 1
+        _, params = driver.queries[0]
+        rows = params["memories"]
+        assert [row["role"] for row in rows] == ["user", "assistant"]
+        assert all(row["user_id"] == "u1" for row in rows)
+        assert all("thread_id" not in row for row in rows)
+        assert all("embedding" in row for row in rows)
+        assert rows[0]["timestamp"] == rows[1]["timestamp"]
+        ids = [uuid.UUID(row["id"]) for row in rows]
+        assert len(set(ids)) == 2
+        assert all(i.version == 4 for i in ids)
+        query, _ = driver.queries[0]
+        assert "db.create.setNodeVectorProperty(m, 'embedding', memory.embedding)" in query
+
+    @pytest.mark.asyncio
+    async def test_store_skips_embedding_short_texts(self) -> None:
+        """Texts below embed_min_length should be stored without an embedding."""
+        embedder = FakeEmbedder()
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(memory_roles={"user"}, embedder=embedder, embedding_dimensions=3, embed_min_length=5)
+        messages = [
+            ChatMessage(role=Role.USER, text="ok"),
+            ChatMessage(role=Role.USER, text="What is the engine status?"),
+        ]
+        await manager.store(driver, messages, ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+
+        query, params = driver.queries[0]
+        rows = params["memories"]
+        assert "embedding" not in rows[0]
+        assert "embedding" in rows[1]
+        assert embedder.calls == ["What is the engine status?"]
+        assert "setNodeVectorProperty" in query
+
+    @pytest.mark.asyncio
+    async def test_store_quantizes_embeddings(self) -> None:
+        """quantize_embeddings should send int8-range integers with the same direction."""
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(
+            memory_roles={"user"}, embedder=FakeEmbedder(), embedding_dimensions=3, quantize_embeddings=True
+        )
+        messages = [ChatMessage(role=Role.USER, text="four")]
+        await manager.store(driver, messages, ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+
+        _, params = driver.queries[0]
+        # FakeEmbedder returns [len(text), 1, 0] = [4, 1, 0]
+        assert params["memories"][0]["embedding"] == [127, 32, 0]
+
+    @pytest.mark.asyncio
+    async def test_store_splits_large_batches(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Stores larger than STORE_BATCH_SIZE should use one transaction per batch."""
+        monkeypatch.setattr("agent_framework_neo4j._memory.STORE_BATCH_SIZE", 2)
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(memory_roles={"user"})
+        messages = [ChatMessage(role=Role.USER, text=f"message {i}") for i in range(5)]
+        await manager.store(driver, messages, ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+
+        assert driver.transactions == 3
+        batches = [[row["text"] for row in params["memories"]] for _, params in driver.queries]
+        assert batches == [["message 0", "message 1"], ["message 2", "message 3"], ["message 4"]]
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_batches_in_parallel(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Batches of one large write should run concurrently, one session each."""
+        monkeypatch.setattr("agent_framework_neo4j._memory.STORE_BATCH_SIZE", 2)
+        active = 0
+        peak = 0
+
+        class SlowWriteSession(FakeAsyncSession):
+            async def execute_write(self, work: Any, *args: Any, **kwargs: Any) -> Any:
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+                return await super().execute_write(work, *args, **kwargs)
+
+        driver = FakeAsyncDriver()
+        driver.session = lambda **_kwargs: SlowWriteSession(driver)  # type: ignore[method-assign]
+        manager = MemoryManager(memory_roles={"user"}, flush_interval=60.0)
+        messages = [ChatMessage(role=Role.USER, text=f"message {i}") for i in range(5)]
+        await manager.store(driver, messages, ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+
+        assert driver.transactions == 3
+        assert peak == 3
+        texts = sorted(row["text"] for _, params in driver.queries for row in params["memories"])
+        assert texts == [f"message {i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_store_embeds_next_segment_during_write(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Large stores should embed the next segment while the current one is written."""
+        monkeypatch.setattr("agent_framework_neo4j._memory.STORE_BATCH_SIZE", 2)
+        embedder = FakeEmbedder()
+        embedded_after_write: list[int] = []
+
+        class SlowWriteSession(FakeAsyncSession):
+            async def execute_write(self, work: Any, *args: Any, **kwargs: Any) -> Any:
+                result = await super().execute_write(work, *args, **kwargs)
+                await asyncio.sleep(0.05)
+                embedded_after_write.append(len(embedder.calls))
+                return result
+
+        driver = FakeAsyncDriver()
+        driver.session = lambda **_kwargs: SlowWriteSession(driver)  # type: ignore[method-assign]
+        manager = MemoryManager(memory_roles={"user"}, embedder=embedder, embedding_dimensions=3)
+        messages = [ChatMessage(role=Role.USER, text=f"message {i}") for i in range(5)]
+        await manager.store(driver, messages, ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+
+        assert driver.transactions == 3
+        # Each segment's embeddings were computed while the previous one was written
+        assert embedded_after_write == [4, 5, 5]
+        assert all("embedding" in params["memories"][0] for _, params in driver.queries)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(("agent", "concurrent"), [("Neo4j/5.23.0", True), ("Neo4j/5.22.0", False)])
+    async def test_store_large_batches_in_concurrent_transactions(
+        self, monkeypatch: pytest.MonkeyPatch, agent: str, concurrent: bool
+    ) -> None:
+        """Large stores should use IN CONCURRENT TRANSACTIONS only on servers supporting it."""
+        monkeypatch.setattr("agent_framework_neo4j._memory.CONCURRENT_WRITE_THRESHOLD", 2)
+        driver = FakeAsyncDriver(agent=agent)
+        manager = MemoryManager(memory_roles={"user"})
+        messages = [ChatMessage(role=Role.USER, text=f"message {i}") for i in range(3)]
+        await manager.store(driver, messages, ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+
+        assert len(driver.queries) == 1
+        query, params = driver.queries[0]
+        assert len(params["memories"]) == 3
+        assert ("IN CONCURRENT TRANSACTIONS OF 200 ROWS" in query) is concurrent
+        assert driver.transactions == (0 if concurrent else 1)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_store_ends_subquery_with_write(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Concurrent embedding writes should import via CALL (memory) and end in a write clause."""
+        monkeypatch.setattr("agent_framework_neo4j._memory.CONCURRENT_WRITE_THRESHOLD", 2)
+        driver = FakeAsyncDriver(agent="Neo4j/5.23.0")
+        manager = MemoryManager(
+            memory_roles={"user"}, embedder=FakeEmbedder(), embedding_dimensions=3, embed_min_length=5
+        )
+        messages = [ChatMessage(role=Role.USER, text=text) for text in ("ok", "first question", "second question")]
+        await manager.store(driver, messages, ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+
+        (embedded_query, embedded), (plain_query, plain) = driver.queries[-2:]
+        assert [row["text"] for row in embedded["memories"]] == ["first question", "second question"]
+        assert [row["text"] for row in plain["memories"]] == ["ok"]
+        embedded_query = " ".join(embedded_query.split())
+        assert "CALL (memory) {" in embedded_query
+        assert "WITH memory" not in embedded_query
+        assert embedded_query.endswith(
+            "CALL db.create.setNodeVectorProperty(m, 'embedding', memory.embedding) SET m:Memory "
+            "} IN CONCURRENT TRANSACTIONS OF 200 ROWS"
+        )
+        assert "setNodeVectorProperty" not in plain_query
+
+    @pytest.mark.asyncio
+    async def test_store_buffers_until_flush(self) -> None:
+        """With flush_interval, rows from several stores should share one transaction."""
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(memory_roles={"user"}, flush_interval=60.0)
+        await manager.store(driver, [ChatMessage(role=Role.USER, text="first")], ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+        message = ChatMessage(role=Role.USER, text="second", message_id="msg-2")
+        await manager.store(driver, [message], ScopeFilter(user_id="u2"))  # type: ignore[arg-type]
+        assert driver.transactions == 0
+
+        await manager.flush(driver)  # type: ignore[arg-type]
+
+        assert driver.transactions == 1
+        _, params = driver.queries[0]
+        assert params["memories"][1]["message_id"] == "msg-2"
+        assert [(row["text"], row["user_id"]) for row in params["memories"]] == [
+            ("first", "u1"),
+            ("second", "u2"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_store_sets_row_map(self) -> None:
+        """Rows should carry only the properties to set, written with one map SET."""
+        manager = MemoryManager(memory_roles={"user"})
+        driver = FakeAsyncDriver()
+        await manager.store(driver, [ChatMessage(role=Role.USER, text="plain")], ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+        plain_query, params = driver.queries[-1]
+        assert "SET m = memory {.*, embedding: null}" in plain_query
+        assert "setNodeVectorProperty" not in plain_query
+        assert set(params["memories"][0]) == {"id", "text", "role", "timestamp", "user_id"}
+
+        message = ChatMessage(role=Role.USER, text="named", message_id="msg-1", author_name="Ada")
+        await manager.store(driver, [message], ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+        named_query, params = driver.queries[-1]
+        assert named_query == plain_query
+        assert params["memories"][0]["message_id"] == "msg-1"
+        assert params["memories"][0]["author_name"] == "Ada"
+
+    @pytest.mark.asyncio
+    async def test_store_filters_by_roles_mask(self) -> None:
+        """Only messages whose role is in memory_roles should be stored."""
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(memory_roles={"user", "system"})
+        assert manager._roles_mask == 0b101
+        messages = [
+            ChatMessage(role=Role.USER, text="question"),
+            ChatMessage(role=Role.ASSISTANT, text="answer"),
+            ChatMessage(role=Role.SYSTEM, text="instructions"),
+            ChatMessage(role=Role.TOOL, text="tool output"),
+        ]
+        await manager.store(driver, messages, ScopeFilter(user_id="u1"))  # type: ignore[arg-type]
+
+        _, params = driver.queries[0]
+        assert [row["role"] for row in params["memories"]] == ["user", "system"]
+
+    @pytest.mark.asyncio
+    async def test_search_returns_records(self) -> None:
+        """Search should return memory records scoped by the filter."""
+        driver = FakeAsyncDriver(records=[{"text": "hi", "role": "user", "timestamp": "t", "score": 0.9}])
+        manager = MemoryManager(memory_roles={"user"})
+        memories = await manager.search(driver, "hello", ScopeFilter(user_id="u1"), top_k=3)  # type: ignore[arg-type]
+
+        assert memories == [MemoryRecord(text="hi", role="user", timestamp="t", score=0.9)]
+        assert driver.read_transactions == 1
+        _, params = driver.queries[0]
+        assert params["user_id"] == "u1"
+        assert params["top_k"] == 3
+
+    @pytest.mark.asyncio
+    async def test_recency_search_orders_before_return(self) -> None:
+        """Without an embedder, ORDER BY/LIMIT must follow a WITH, not precede RETURN."""
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(memory_roles={"user"})
+        await manager.search(driver, "hello", ScopeFilter(user_id="u1"), top_k=3)  # type: ignore[arg-type]
+
+        query = " ".join(driver.queries[0][0].split())
+        assert "WHERE m.user_id = $user_id WITH m ORDER BY m.timestamp DESC LIMIT $top_k RETURN m.text" in query
+
+    @pytest.mark.asyncio
+    async def test_search_without_scope_returns_nothing(self) -> None:
+        """An empty scope should not query Neo4j or embed the query."""
+        driver = FakeAsyncDriver(records=[{"text": "hi", "role": "user", "timestamp": "t", "score": 1.0}])
+        embedder = FakeEmbedder()
+        manager = MemoryManager(memory_roles={"user"}, embedder=embedder)
+        assert await manager.search(driver, "hello", ScopeFilter(), top_k=3) == []  # type: ignore[arg-type]
+        assert driver.queries == []
+        assert embedder.calls == []
+
+    @pytest.mark.asyncio
+    async def test_search_stops_reading_at_top_k(self) -> None:
+        """Search should return at most top_k records even if more are streamed."""
+        records = [{"text": f"m{i}", "role": "user", "timestamp": "t", "score": 1.0} for i in range(5)]
+        driver = FakeAsyncDriver(records=records)
+        manager = MemoryManager(memory_roles={"user"})
+        memories = await manager.search(driver, "hello", ScopeFilter(user_id="u1"), top_k=2)  # type: ignore[arg-type]
+        assert [m.text for m in memories] == ["m0", "m1"]
+
+    @pytest.mark.asyncio
+    async def test_vector_search_overfetches_before_scope_filter(self) -> None:
+        """Vector search should fetch extra candidates, then limit after filtering."""
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(memory_roles={"user"}, embedder=FakeEmbedder(), embedding_dimensions=3)
+        await manager.search(driver, "hello", ScopeFilter(user_id="u1"), top_k=3)  # type: ignore[arg-type]
+
+        query, params = driver.queries[0]
+        assert "queryNodes($index_name, $candidate_k, $query_embedding)" in query
+        assert "LIMIT $top_k" in query
+        assert params["candidate_k"] > params["top_k"] == 3
+
+    @pytest.mark.asyncio
+    async def test_exact_search_scores_scoped_memories(self) -> None:
+        """exact_search should rank scoped memories by cosine without the index."""
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(
+            memory_roles={"user"}, embedder=FakeEmbedder(), embedding_dimensions=3, exact_search=True
+        )
+        await manager.search(driver, "hello", ScopeFilter(user_id="u1"), top_k=3)  # type: ignore[arg-type]
+
+        query, params = driver.queries[0]
+        assert "queryNodes" not in query
+        assert "vector.similarity.cosine(m.embedding, $query_embedding)" in query
+        assert "m.user_id = $user_id" in query
+        assert "candidate_k" not in params
+
+    @pytest.mark.asyncio
+    async def test_search_reuses_prebuilt_query_per_scope(self) -> None:
+        """Searches with the same scope shape should reuse one query string."""
+        driver = FakeAsyncDriver()
+        manager = MemoryManager(memory_roles={"user"})
+        await manager.search(driver, "a", ScopeFilter(user_id="u1"), top_k=3)  # type: ignore[arg-type]
+        await manager.search(driver, "b", ScopeFilter(user_id="u2"), top_k=3)  # type: ignore[arg-type]
+        await manager.search(driver, "c", ScopeFilter(thread_id="t1"), top_k=3)  # type: ignore[arg-type]
+
+        first, second, third = (query for query, _ in driver.queries)
+        assert first is second
+        assert "m.user_id = $user_id" in first
+        assert "m.thread_id = $thread_id" in third
+        assert "m.user_id" not in third
+
+
+class TestQueryCache:
+    """Test QueryCache similarity/TTL/LRU behavior."""
+
+    def test_similar_embedding_hits(self) -> None:
+        """Near-duplicate embeddings above the threshold should hit."""
+        cache: QueryCache[str] = QueryCache(max_size=4, similarity_threshold=0.95)
+        cache.put("k", "result", [1.0, 0.0, 0.0])
+        assert cache.get("k", [0.99, 0.05, 0.0]) == "result"
+
+    def test_closest_entry_wins(self) -> None:
+        """When several entries pass the threshold, the most similar is returned."""
+        cache: QueryCache[str] = QueryCache(max_size=4, similarity_threshold=0.9)
+        cache.put("k", "near", [1.0, 0.3, 0.0])
+        cache.put("k", "exact", [1.0, 0.0, 0.0])
+        assert cache.get("k", [1.0, 0.01, 0.0]) == "exact"
+
+    def test_dissimilar_embedding_misses(self) -> None:
+        """Embeddings below the threshold should miss."""
+        cache: QueryCache[str] = QueryCache(max_size=4, similarity_threshold=0.95)
+        cache.put("k", "result", [1.0, 0.0, 0.0])
+        assert cache.get("k", [0.0, 1.0, 0.0]) is None
+        assert cache.get("other", [1.0, 0.0, 0.0]) is None
+
+    def test_exact_key_without_embedding(self) -> None:
+        """Entries without embeddings should match by key only."""
+        cache: QueryCache[str] = QueryCache(max_size=4)
+        cache.put(("idx", 5, "engine vibration"), "result")
+        assert cache.get(("idx", 5, "engine vibration")) == "result"
+        assert cache.get(("idx", 5, "engine noise")) is None
+
+    def test_similarity_lookup_skips_entries_without_embedding(self) -> None:
+        """A key mixing exact and embedded entries should still hit on similarity."""
+        cache: QueryCache[str] = QueryCache(max_size=4)
+        cache.put("idx", "exact")
+        cache.put("idx", "first", [0.0, 1.0])
+        cache.put("idx", "second", [1.0, 0.0])
+        assert cache.get("idx", [0.99, 0.01]) == "second"
+        assert cache.get("idx", [0.01, 0.99]) == "first"
+
+        only_exact: QueryCache[str] = QueryCache(max_size=4)
+        only_exact.put("idx", "exact")
+        assert only_exact.get("idx", [1.0, 0.0]) is None
+
+    def test_expired_entries_miss(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Entries past their TTL should not be returned."""
+        import agent_framework_neo4j._cache as cache_module
+
+        now = 1000.0
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now)
+        cache: QueryCache[str] = QueryCache(max_size=4, ttl_seconds=10.0)
+        cache.put("k", "result", [1.0, 0.0])
+        now = 1011.0
+        assert cache.get("k", [1.0, 0.0]) is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self) -> None:
+        """Least recently used entries should be evicted first."""
+        cache: QueryCache[str] = QueryCache(max_size=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        assert cache.get("a") == "A"
+        cache.put("c", "C")
+        assert cache.get("b") is None
+        assert cache.get("a") == "A"
+        assert cache.get("c") == "C"
+        assert len(cache) == 2
+
+    def test_provider_cache_disabled_by_default(self) -> None:
+        """Provider should not create a result cache unless configured."""
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext")
+        assert provider._search_cache is None
+
+        provider = Neo4jContextProvider(index_name="test_index", index_type="fulltext", cache_max_size=16)
+        assert provider._search_cache is not None
+        assert provider._search_cache.max_size == 16
+
+
+class TestCachedEmbedder:
+    """Test CachedEmbedder exact-match caching."""
+
+    def test_repeated_text_hits_cache(self) -> None:
+        """The wrapped embedder should only see each distinct text once."""
+        inner = FakeEmbedder()
+        embedder = CachedEmbedder(inner)
+        first = embedder.embed_query("engine")
+        assert embedder.embed_query("engine") == first
+        embedder.embed_query("wing")
+        assert inner.calls == ["engine", "wing"]
+
+    def test_evicts_least_recently_used(self) -> None:
+        """The oldest unused text should be evicted when full."""
+        inner = FakeEmbedder()
+        embedder = CachedEmbedder(inner, max_size=2)
+        embedder.embed_query("a")
+        embedder.embed_query("b")
+        embedder.embed_query("a")
+        embedder.embed_query("c")
+        embedder.embed_query("a")
+        embedder.embed_query("b")
+        assert inner.calls == ["a", "b", "c", "b"]
+        assert len(embedder) == 2
+
+    def test_embed_documents_only_sends_misses(self) -> None:
+        """Batch embedding should forward only uncached texts, preserving order."""
+        inner = FakeBatchEmbedder()
+        embedder = CachedEmbedder(inner)
+        embedder.embed_documents(["bb"])
+        embeddings = embedder.embed_documents(["a", "bb", "ccc"])
+        assert embeddings == [[1.0, 0.0, 1.0], [2.0, 0.0, 1.0], [3.0, 0.0, 1.0]]
+        assert inner.batches == [["bb"], ["a", "ccc"]]
+
+    def test_query_and_document_embeddings_cached_separately(self) -> None:
+        """A text embedded as a query should not reuse its document vector, or vice versa."""
+        inner = FakeBatchEmbedder()
+        embedder = CachedEmbedder(inner)
+        # FakeBatchEmbedder embeds queries as [len, 1, 0] and documents as [len, 0, 1]
+        assert embedder.embed_query("engine") == [6.0, 1.0, 0.0]
+        assert embedder.embed_documents(["engine"]) == [[6.0, 0.0, 1.0]]
+        assert embedder.embed_query("engine") == [6.0, 1.0, 0.0]
+        assert embedder.embed_documents(["engine"]) == [[6.0, 0.0, 1.0]]
+        assert inner.calls == ["engine"]
+        assert inner.batches == [["engine"]]
+
+    def test_shared_per_embedder(self) -> None:
+        """Providers using the same embedder should share one cache."""
+        inner = FakeEmbedder()
+        shared = get_cached_embedder(inner)
+        assert get_cached_embedder(inner) is shared
+        assert get_cached_embedder(shared) is shared
+        assert get_cached_embedder(FakeEmbedder()) is not shared
+
+    def test_provider_embedding_cache_size(self) -> None:
+        """embedding_cache_size should size the shared cache, or disable it at 0."""
+        inner = FakeEmbedder()
+        provider = Neo4jContextProvider(
+            index_name="test_index", index_type="vector", embedder=inner, embedding_cache_size=8
+        )
+        assert isinstance(provider._embedder, CachedEmbedder)
+        assert provider._embedder.max_size == 8
+
+        provider = Neo4jContextProvider(
+            index_name="test_index", index_type="vector", embedder=inner, embedding_cache_size=0
+        )
+        assert provider._embedder is inner